@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of scan result decoding: time and peak memory.
+
+Serves a synthetic scan result through an in-process httpx transport, in
+64 KiB chunks generated on the fly, and decodes it three ways:
+
+    httpx json()     read the body, then response.json() (stdlib json on the text)
+    decode_response  read the body, then orjson (or json) on the bytes
+    stream           src.json_codec.decode_response_stream (ijson while reading;
+                     without a compiled ijson backend it is the same as httpx json())
+
+Peak memory is measured with tracemalloc and excludes the payload source.
+It includes the decoded result itself, which is roughly twice the body
+size for typical vulnerability records. orjson is fastest, but while it
+parses, its peak is many times the body size.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_decode [--vulns 20000] [--description-bytes 300]
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import httpx
+
+from benchmarks.fake_backend import make_vulnerabilities
+from src.json_codec import STREAMING_AVAILABLE, decode_response, decode_response_stream, orjson
+
+CHUNK_SIZE = 64 * 1024
+
+class GeneratedBody(httpx.AsyncByteStream):
+    """Yields a scan result's JSON in chunks without holding the whole body."""
+
+    def __init__(self, vulns: int, description_bytes: int):
+        self.vulns = vulns
+        self.description_bytes = description_bytes
+
+    async def __aiter__(self):
+        buffer = b'{"repository": "https://github.com/bench/repo", "scan_time": "now", "status": "completed", '
+        buffer += f'"total_count": {self.vulns}, "vulnerabilities": ['.encode()
+        batch = 500
+        for start in range(0, self.vulns, batch):
+            items = make_vulnerabilities(f"repo-{start}", min(batch, self.vulns - start), self.description_bytes)
+            for i, item in enumerate(items):
+                buffer += (b"," if start + i else b"") + json.dumps(item).encode()
+                while len(buffer) >= CHUNK_SIZE:
+                    yield buffer[:CHUNK_SIZE]
+                    buffer = buffer[CHUNK_SIZE:]
+        yield buffer + b"]}"
+
+async def read_then_json(response: httpx.Response):
+    await response.aread()
+    return response.json()
+
+async def read_then_decode(response: httpx.Response):
+    await response.aread()
+    return decode_response(response)
+
+async def run(name: str, decode, args: argparse.Namespace):
+    def handler(request):
+        return httpx.Response(200, stream=GeneratedBody(args.vulns, args.description_bytes))
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = await client.send(client.build_request("POST", "http://backend/api/v1/scan"), stream=True)
+        try:
+            result = await decode(response)
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    size = response.num_bytes_downloaded
+    print(f"{name:<16} {elapsed * 1000:>9.0f} ms  peak {peak / 2**20:>8.1f} MiB  "
+          f"({peak / size:4.2f}x body of {size / 2**20:.1f} MiB, {len(result['vulnerabilities'])} vulnerabilities)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vulns", type=int, default=20000)
+    parser.add_argument("--description-bytes", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson is not None else 'no'}, streaming decode: {'yes' if STREAMING_AVAILABLE else 'no'}\n")
+    asyncio.run(run("httpx json()", read_then_json, args))
+    asyncio.run(run("decode_response", read_then_decode, args))
+    asyncio.run(run("stream", decode_response_stream, args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of the console log formatters.
+
+Formats the same mix of records with the old template-based ISTFormatter and
+with ISTJSONFormatter and reports records per second for each. Records are
+spread over a few seconds of timestamps so the per-second cache is exercised.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_logging [--records 200000] [--repeat 5]
+"""
+import argparse
+import json
+import logging
+import time
+import pytz
+
+from datetime import datetime
+from config.logging_config import ISTJSONFormatter
+
+TEMPLATE = (
+    '{"timestamp": "%(asctime)s", "service": "mcp-service", '
+    '"level": "%(levelname)s", "message": "%(message)s", '
+    '"module": "%(name)s", "function": "%(funcName)s", "line": %(lineno)d}'
+)
+
+class ISTFormatter(logging.Formatter):
+    """The formatter used before ISTJSONFormatter, kept here as the baseline."""
+
+    def formatTime(self, record, datefmt=None):
+        ist = pytz.timezone("Asia/Kolkata")
+        dt = datetime.fromtimestamp(record.created, ist)
+        if datefmt:
+            return dt.strftime(datefmt)
+        return dt.strftime("%Y-%m-%d %H:%M:%S %z")
+
+MESSAGES = [
+    ("Scanning repository: %s", ("https://github.com/octo/repo",)),
+    ("Received response with status code: %s", (200,)),
+    ("Unexpected error for job status: %s: %s", (500, '{"detail": "backend said \\"no\\""}')),
+    ("Scan cache hit for repo: %s at commit %s", ("https://github.com/octo/repo", "9f2c1e0")),
+]
+
+def make_records(count: int) -> list[logging.LogRecord]:
+    start = time.time()
+    records = []
+    for i in range(count):
+        msg, args = MESSAGES[i % len(MESSAGES)]
+        record = logging.LogRecord("mcp-service", logging.INFO, __file__, 42, msg, args, None, func="scan")
+        # About 1000 records per second of log time, like a busy server.
+        record.created = start + i / 1000
+        records.append(record)
+    return records
+
+def bench(formatter: logging.Formatter, records: list[logging.LogRecord], repeat: int) -> float:
+    """Returns the best records-per-second rate over `repeat` runs."""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        elapsed = time.perf_counter() - started
+        best = max(best, len(records) / elapsed)
+    return best
+
+def count_valid(formatter: logging.Formatter, records: list[logging.LogRecord]) -> int:
+    valid = 0
+    for record in records:
+        try:
+            json.loads(formatter.format(record))
+            valid += 1
+        except ValueError:
+            pass
+    return valid
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    sample = records[:len(MESSAGES)]
+    formatters = {
+        "ISTFormatter (template)": ISTFormatter(TEMPLATE),
+        "ISTJSONFormatter": ISTJSONFormatter(),
+    }
+    baseline = None
+    for name, formatter in formatters.items():
+        rate = bench(formatter, records, args.repeat)
+        baseline = baseline or rate
+        valid = count_valid(formatter, sample)
+        print(f"{name:<26} {rate:>12,.0f} records/s  {rate / baseline:5.2f}x  valid JSON {valid}/{len(sample)}")
+
+if __name__ == "__main__":
+    main()
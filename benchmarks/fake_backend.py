@@ -0,0 +1,215 @@
+"""
+Stand-in scanner backend for benchmarks and load tests.
+
+Implements the backend endpoints the MCP tools call, plus the GitHub
+"commits/HEAD" lookup, with configurable latency and payload sizes:
+
+    POST   /api/v1/scan                 vulnerabilities after --scan-latency
+    POST   /api/v1/scan-and-fix         202 with a job that finishes after --job-duration
+    GET    /api/v1/jobs                 paginated job list
+    GET    /api/v1/jobs/{job_id}        job status
+    DELETE /api/v1/jobs/{job_id}        204
+    GET    /health, /status
+    GET    /repos/{owner}/{repo}/commits/HEAD
+
+When a scan-and-fix request carries a callback_url, the job's completion is
+posted to it, like the real backend does.
+
+Usage (from the repository root):
+    python -m benchmarks.fake_backend --port 8000 --scan-latency 0.5 --vulns 200
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import uuid
+import httpx
+import uvicorn
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+SEVERITIES = ("low", "medium", "high", "critical")
+PACKAGE_MANAGERS = ("npm", "pip", "maven", "go")
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def make_vulnerabilities(repo_url: str, count: int, description_bytes: int) -> list[dict]:
+    """Builds a deterministic list of vulnerabilities for a repository."""
+    rng = random.Random(repo_url)
+    return [
+        {
+            "current_version": f"1.{i % 10}.{rng.randint(0, 9)}",
+            "cve": f"CVE-2024-{10000 + i}",
+            "cvs_score": round(rng.uniform(1.0, 10.0), 1),
+            "description": ("x" * description_bytes),
+            "file_path": f"services/svc{i % 7}/{'package.json' if i % 2 else 'requirements.txt'}",
+            "package_manager": PACKAGE_MANAGERS[i % len(PACKAGE_MANAGERS)],
+            "package_name": f"package-{i}",
+            "safe_version": f"2.{i % 10}.0",
+            "severity": SEVERITIES[i % len(SEVERITIES)],
+        }
+        for i in range(count)
+    ]
+
+class FakeBackend:
+    """In-memory job store and request handlers."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.jobs = {}
+        self.scans = 0
+        self.callback_client = httpx.AsyncClient(timeout=10.0)
+        for i in range(args.jobs):
+            job_id = str(uuid.uuid4())
+            self.jobs[job_id] = {
+                "id": job_id,
+                "repo_url": f"https://github.com/bench/repo-{i % 50}",
+                "status": "completed",
+                "created_at": _now(),
+                "started_at": _now(),
+                "completed_at": _now(),
+                "result": {"fixed": i % 5, "tickets": []},
+            }
+
+    async def _latency(self, seconds: float):
+        if seconds > 0:
+            await asyncio.sleep(seconds * random.uniform(1 - self.args.jitter, 1 + self.args.jitter))
+
+    async def scan(self, request: Request):
+        payload = await request.json()
+        self.scans += 1
+        await self._latency(self.args.scan_latency)
+        vulnerabilities = make_vulnerabilities(payload.get("repo_url", ""), self.args.vulns, self.args.description_bytes)
+        return JSONResponse({
+            "repository": payload.get("repo_url"),
+            "scan_time": _now(),
+            "status": "completed",
+            "total_count": len(vulnerabilities),
+            "vulnerabilities": vulnerabilities,
+        })
+
+    async def scan_and_fix(self, request: Request):
+        payload = await request.json()
+        await self._latency(self.args.latency)
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = {
+            "id": job_id,
+            "repo_url": payload.get("repo_url"),
+            "status": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "completed_at": None,
+            "result": None,
+        }
+        asyncio.create_task(self._run_job(job_id, payload.get("callback_url"), payload.get("callback_token")))
+        return JSONResponse({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/v1/jobs/{job_id}",
+            "repository": payload.get("repo_url"),
+            "message": "Scan and fix job queued.",
+        }, status_code=202)
+
+    async def _run_job(self, job_id: str, callback_url: str | None, callback_token: str | None):
+        job = self.jobs[job_id]
+        await asyncio.sleep(self.args.job_duration / 2)
+        job.update(status="running", started_at=_now())
+        await asyncio.sleep(self.args.job_duration / 2)
+        job.update(status="completed", completed_at=_now(), result={"fixed": 1, "tickets": []})
+        if callback_url:
+            headers = {"X-Callback-Token": callback_token} if callback_token else {}
+            try:
+                await self.callback_client.post(callback_url, json={"id": job_id, "status": "completed"}, headers=headers)
+            except httpx.HTTPError:
+                pass
+
+    async def list_jobs(self, request: Request):
+        await self._latency(self.args.latency)
+        page = max(1, int(request.query_params.get("page", 1)))
+        limit = max(1, min(100, int(request.query_params.get("limit", 10))))
+        status = request.query_params.get("status")
+        repo_url = request.query_params.get("repo_url")
+        jobs = [
+            {key: job[key] for key in ("id", "repo_url", "status", "created_at", "completed_at")}
+            for job in self.jobs.values()
+            if (not status or job["status"] == status) and (not repo_url or job["repo_url"] == repo_url)
+        ]
+        start = (page - 1) * limit
+        return JSONResponse({
+            "jobs": jobs[start:start + limit],
+            "pagination": {"page": page, "limit": limit, "total": len(jobs), "total_pages": -(-len(jobs) // limit)},
+        })
+
+    async def job(self, request: Request):
+        await self._latency(self.args.latency)
+        job_id = request.path_params["job_id"]
+        if job_id not in self.jobs:
+            return JSONResponse({"detail": "Job not found"}, status_code=404)
+        if request.method == "DELETE":
+            del self.jobs[job_id]
+            return Response(status_code=204)
+        return JSONResponse(self.jobs[job_id])
+
+    async def health(self, request: Request):
+        await self._latency(self.args.latency)
+        return JSONResponse({"status": "healthy", "timestamp": _now()})
+
+    async def status(self, request: Request):
+        await self._latency(self.args.latency)
+        return JSONResponse({"status": "running", "jobs": len(self.jobs), "scans": self.scans, "timestamp": _now()})
+
+    async def head_commit(self, request: Request):
+        # Changes every --commit-period seconds so scan caching is exercised but not permanent.
+        bucket = int(asyncio.get_running_loop().time() // self.args.commit_period) if self.args.commit_period > 0 else 0
+        key = f"{request.path_params['owner']}/{request.path_params['repo']}/{bucket}"
+        return PlainTextResponse(hashlib.sha1(key.encode()).hexdigest())
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/api/v1/scan", self.scan, methods=["POST"]),
+                Route("/api/v1/scan-and-fix", self.scan_and_fix, methods=["POST"]),
+                Route("/api/v1/jobs", self.list_jobs, methods=["GET"]),
+                Route("/api/v1/jobs/{job_id}", self.job, methods=["GET", "DELETE"]),
+                Route("/health", self.health, methods=["GET"]),
+                Route("/status", self.status, methods=["GET"]),
+                Route("/repos/{owner}/{repo}/commits/HEAD", self.head_commit, methods=["GET"]),
+            ],
+            middleware=[Middleware(GZipMiddleware, minimum_size=1024)] if self.args.gzip else [],
+            lifespan=self._lifespan,
+        )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette):
+        yield
+        await self.callback_client.aclose()
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds for job, list, health and status calls")
+    parser.add_argument("--scan-latency", type=float, default=0.2, help="seconds for a scan")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency varies by up to this fraction")
+    parser.add_argument("--job-duration", type=float, default=2.0, help="seconds until a scan-and-fix job completes")
+    parser.add_argument("--vulns", type=int, default=100, help="vulnerabilities per scan")
+    parser.add_argument("--description-bytes", type=int, default=200, help="size of each vulnerability description")
+    parser.add_argument("--jobs", type=int, default=500, help="completed jobs present at start")
+    parser.add_argument("--gzip", action="store_true", help="gzip responses when the client accepts it")
+    parser.add_argument("--commit-period", type=float, default=30.0, help="seconds between HEAD commit changes (0 = never)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    uvicorn.run(FakeBackend(args).app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Load driver for the MCP server.
+
+Starts benchmarks.fake_backend in a subprocess and src.server's MCP app in
+this process, then runs many concurrent MCP clients over streamable-http
+against it. Each tool is driven in its own phase, so every row of the report
+covers one tool:
+
+    workload       calls  errors   p50 ms   p99 ms   calls/s  lag p50 ms  lag p99 ms  lag max ms
+
+The server runs on the main thread's event loop next to a sampler that
+measures how late a periodic sleep wakes up (event-loop lag). The clients
+run on their own event loop in a separate thread so their work does not
+show up as server lag.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --clients 50 --duration 10
+    python -m benchmarks.load_test --tools health,scan --scan-latency 0.5 --output baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uvicorn
+
+# Tool name and argument builder for each workload. The builder gets the
+# shared state dict, which holds "job_ids" and the number of "repos".
+WORKLOADS = {
+    "health": ("Health Check", lambda state: {}),
+    "status": ("Service Status", lambda state: {}),
+    "scan": ("Scan for Vulnerabilities", lambda state: {
+        "repo_url": f"https://github.com/bench/repo-{random.randrange(state['repos'])}",
+        "github_pat": "bench-token",
+        "assignee": "bench",
+        "dry_run": True,
+    }),
+    "scan_filtered": ("Scan for Vulnerabilities", lambda state: {
+        "repo_url": f"https://github.com/bench/repo-{random.randrange(state['repos'])}",
+        "github_pat": "bench-token",
+        "assignee": "bench",
+        "dry_run": True,
+        "severity": "high,critical",
+        "page_size": 20,
+    }),
+    "list_jobs": ("List Scan and Fix Jobs", lambda state: {"page": random.randint(1, 5), "limit": 20}),
+    "job_status": ("Get Scan and Fix Job Status", lambda state: {"job_id": random.choice(state["job_ids"])}),
+    "scan_and_fix": ("Scan and Fix Vulnerabilities", lambda state: {
+        "repo_url": f"https://github.com/bench/repo-{random.randrange(state['repos'])}",
+        "github_pat": "bench-token",
+        "jira_server_url": "https://jira.example.com",
+        "jira_pat": "bench-token",
+        "jira_project_id": "BENCH",
+        "jira_assignee_id": "bench",
+        "jira_reporter_id": "bench",
+        "jira_custom_fields": {},
+        "assignee": "bench",
+        "dry_run": True,
+    }),
+}
+
+DEFAULT_TOOLS = "health,status,list_jobs,job_status,scan,scan_filtered"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Nothing is listening on port {port} after {timeout} seconds")
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+def _is_error_result(result) -> bool:
+    content = result.structured_content
+    if isinstance(content, dict) and "result" in content and len(content) == 1:
+        content = content["result"]
+    return result.is_error or (isinstance(content, dict) and content.get("status") == "error")
+
+async def sample_loop_lag(samples: list, interval: float):
+    """Records (time, lag) pairs: how much later than asked each sleep woke up."""
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        samples.append((now, max(0.0, now - expected)))
+
+async def _drive(url: str, args: argparse.Namespace) -> list[dict]:
+    from fastmcp import Client
+
+    clients = [Client(url, timeout=args.call_timeout) for _ in range(args.clients)]
+    await asyncio.gather(*(client.__aenter__() for client in clients))
+    try:
+        listing = await clients[0].call_tool("List Scan and Fix Jobs", {"limit": 100}, raise_on_error=False)
+        jobs = (listing.structured_content or {}).get("jobs") or []
+        state = {"repos": args.repos, "job_ids": [job["id"] for job in jobs] or ["missing-job"]}
+
+        phases = []
+        for name in args.tools.split(","):
+            tool, build_args = WORKLOADS[name.strip()]
+            latencies = []
+            errors = 0
+            started = time.monotonic()
+            deadline = started + args.duration
+
+            async def run_client(client):
+                nonlocal errors
+                while time.monotonic() < deadline:
+                    call_started = time.perf_counter()
+                    try:
+                        result = await client.call_tool(tool, build_args(state), raise_on_error=False)
+                        failed = _is_error_result(result)
+                    except Exception:
+                        failed = True
+                    latencies.append(time.perf_counter() - call_started)
+                    errors += failed
+
+            await asyncio.gather(*(run_client(client) for client in clients))
+            ended = time.monotonic()
+            phases.append({
+                "workload": name.strip(),
+                "tool": tool,
+                "started": started,
+                "ended": ended,
+                "latencies": latencies,
+                "errors": errors,
+            })
+            if args.pause:
+                await asyncio.sleep(args.pause)
+        return phases
+    finally:
+        await asyncio.gather(*(client.__aexit__(None, None, None) for client in clients), return_exceptions=True)
+
+def drive_clients(url: str, args: argparse.Namespace) -> list[dict]:
+    """Runs the clients on a fresh event loop; called in a separate thread."""
+    return asyncio.run(_drive(url, args))
+
+async def run(args: argparse.Namespace, mcp_port: int) -> tuple[list[dict], list]:
+    from src.server import mcp
+    from src.tools import initialize_tool, shutdown_tool
+
+    initialize_tool(mcp)
+    # Served with uvicorn directly so it can be stopped gracefully afterwards.
+    server = uvicorn.Server(uvicorn.Config(
+        mcp.http_app(transport="streamable-http"),
+        host="127.0.0.1",
+        port=mcp_port,
+        log_level="warning",
+    ))
+    serving = asyncio.create_task(server.serve())
+    samples = []
+    sampler = None
+    try:
+        await asyncio.to_thread(wait_for_port, mcp_port)
+        sampler = asyncio.create_task(sample_loop_lag(samples, args.lag_interval))
+        phases = await asyncio.to_thread(drive_clients, f"http://127.0.0.1:{mcp_port}/mcp", args)
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+        server.should_exit = True
+        await asyncio.gather(*(t for t in (sampler, serving) if t is not None), return_exceptions=True)
+        await shutdown_tool()
+    return phases, samples
+
+def summarize(phases: list[dict], samples: list) -> list[dict]:
+    rows = []
+    for phase in phases:
+        lags = [lag for at, lag in samples if phase["started"] <= at <= phase["ended"]]
+        elapsed = phase["ended"] - phase["started"]
+        rows.append({
+            "workload": phase["workload"],
+            "tool": phase["tool"],
+            "calls": len(phase["latencies"]),
+            "errors": phase["errors"],
+            "p50_ms": percentile(phase["latencies"], 50) * 1000,
+            "p99_ms": percentile(phase["latencies"], 99) * 1000,
+            "throughput": len(phase["latencies"]) / elapsed if elapsed > 0 else 0.0,
+            "lag_p50_ms": percentile(lags, 50) * 1000,
+            "lag_p99_ms": percentile(lags, 99) * 1000,
+            "lag_max_ms": max(lags, default=0.0) * 1000,
+        })
+    return rows
+
+def print_report(rows: list[dict], args: argparse.Namespace):
+    print(f"\n{args.clients} clients, {args.duration:g}s per workload\n")
+    print(f"{'workload':<14} {'calls':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'calls/s':>9} "
+          f"{'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for row in rows:
+        print(f"{row['workload']:<14} {row['calls']:>7} {row['errors']:>7} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['throughput']:>9.1f} {row['lag_p50_ms']:>11.2f} {row['lag_p99_ms']:>11.2f} {row['lag_max_ms']:>11.2f}")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent MCP client sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per workload")
+    parser.add_argument("--pause", type=float, default=0.5, help="seconds between workloads")
+    parser.add_argument("--tools", default=DEFAULT_TOOLS, help=f"comma-separated workloads from: {', '.join(WORKLOADS)}")
+    parser.add_argument("--repos", type=int, default=20, help="distinct repositories used by scan workloads")
+    parser.add_argument("--call-timeout", type=float, default=120.0)
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="seconds between loop lag samples")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--log-level", default="WARNING", help="level for the service's own logger")
+    # Passed through to the fake backend
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--scan-latency", type=float, default=0.2)
+    parser.add_argument("--job-duration", type=float, default=2.0)
+    parser.add_argument("--vulns", type=int, default=100)
+    parser.add_argument("--description-bytes", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=500)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.tools.split(",") if name.strip() not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    backend_port = free_port()
+    mcp_port = free_port()
+    backend = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_backend",
+        "--port", str(backend_port),
+        "--latency", str(args.latency),
+        "--scan-latency", str(args.scan_latency),
+        "--job-duration", str(args.job_duration),
+        "--vulns", str(args.vulns),
+        "--description-bytes", str(args.description_bytes),
+        "--jobs", str(args.jobs),
+    ])
+    workdir = tempfile.TemporaryDirectory(prefix="mcp-bench-")
+    try:
+        wait_for_port(backend_port)
+        # The service reads its configuration at import time, so it must be set first.
+        os.environ["API_BASE_URLS"] = f"http://127.0.0.1:{backend_port}"
+        os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{backend_port}"
+        os.environ["JOB_CALLBACK_BASE_URL"] = f"http://127.0.0.1:{mcp_port}"
+        os.environ["JOB_INDEX_PATH"] = os.path.join(workdir.name, "job_index.sqlite3")
+
+        import logging
+        from config.logging_config import setup_logging
+        setup_logging().setLevel(getattr(logging, args.log_level.upper()))
+
+        phases, samples = asyncio.run(run(args, mcp_port))
+        rows = summarize(phases, samples)
+        print_report(rows, args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"args": vars(args), "results": rows}, f, indent=2)
+            print(f"\nWrote {args.output}")
+    finally:
+        backend.terminate()
+        backend.wait(timeout=10)
+        workdir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,308 @@
 """Logging configuration with IST timezone and Apache CLF format"""
+import json
 import logging
+import queue
 import sys
+import threading
+import time
 import pytz
 import logging_loki
 import os
 
 from datetime import datetime
 from logging import Formatter, StreamHandler
+from logging_loki.emitter import LokiEmitterV1
+
+LOKI_SHIPPING_MODE = os.getenv("LOKI_SHIPPING_MODE", "batched")  # "batched" or "sync"
+LOKI_QUEUE_SIZE = int(os.getenv("LOKI_QUEUE_SIZE", 10000))
+LOKI_BATCH_SIZE = int(os.getenv("LOKI_BATCH_SIZE", 500))
+LOKI_FLUSH_INTERVAL = float(os.getenv("LOKI_FLUSH_INTERVAL", 2.0))
+LOKI_QUEUE_POLICY = os.getenv("LOKI_QUEUE_POLICY", "drop_oldest")  # "drop_oldest", "drop_newest" or "block"
+LOKI_BLOCK_TIMEOUT = float(os.getenv("LOKI_BLOCK_TIMEOUT", 0.5))
+LOKI_PUSH_TIMEOUT = float(os.getenv("LOKI_PUSH_TIMEOUT", 10.0))
+
+_configured = False
+
+class ISTJSONFormatter(Formatter):
+    """
+    Renders each record as one JSON object with an IST timestamp.
+
+    The timezone offset is looked up once per hour and the formatted
+    "YYYY-mm-dd HH:MM:SS +zzzz" timestamp once per second, so most records
+    only pay for a single JSON encode. Every field is escaped by the encoder,
+    so messages containing quotes or newlines still produce valid JSON.
+    """
+
+    _encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+    def __init__(self, service: str = "mcp-service", tz=pytz.timezone("Asia/Kolkata")):
+        super().__init__()
+        self.service = service
+        self.tz = tz
+        self._offset = (None, 0, "")  # (hour, offset seconds, "+zzzz")
+        self._stamp = (None, "")      # (second, formatted timestamp)
+
+    def _offset_for(self, seconds: int) -> tuple[int, str]:
+        hour, offset, suffix = self._offset
+        if hour != seconds // 3600:
+            dt = datetime.fromtimestamp(seconds, self.tz)
+            offset = int(dt.utcoffset().total_seconds())
+            suffix = dt.strftime("%z")
+            self._offset = (seconds // 3600, offset, suffix)
+        return offset, suffix
 
-class ISTFormatter(Formatter):
-    """Custom formatter that uses IST timezone"""
-    
     def formatTime(self, record, datefmt=None):
-        """Format time in IST timezone"""
-        ist = pytz.timezone("Asia/Kolkata")
-        dt = datetime.fromtimestamp(record.created, ist)
         if datefmt:
-            s = dt.strftime(datefmt)
-        else:
-            s = dt.strftime("%Y-%m-%d %H:%M:%S %z")
-        return s
+            return datetime.fromtimestamp(record.created, self.tz).strftime(datefmt)
+        seconds = int(record.created)
+        second, stamp = self._stamp
+        if second != seconds:
+            offset, suffix = self._offset_for(seconds)
+            stamp = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds + offset))} {suffix}"
+            self._stamp = (seconds, stamp)
+        return stamp
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record),
+            "service": self.service,
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.name,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return self._encoder.encode(entry)
+
+class BatchingLokiHandler(logging.Handler):
+    """
+    Loki handler that ships records from a background thread.
+
+    emit() only formats the record and puts it on a bounded queue, so the
+    caller never waits on the network. The worker drains the queue and sends
+    one push per batch, either when LOKI_BATCH_SIZE records are waiting or
+    LOKI_FLUSH_INTERVAL seconds after the first record of the batch arrived.
+
+    When the queue is full the policy decides what happens:
+        - "drop_oldest": discard the oldest queued record to make room.
+        - "drop_newest": discard the incoming record.
+        - "block": wait up to LOKI_BLOCK_TIMEOUT seconds for room, then drop it.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        url: str,
+        tags: dict | None = None,
+        auth: tuple | None = None,
+        queue_size: int = LOKI_QUEUE_SIZE,
+        batch_size: int = LOKI_BATCH_SIZE,
+        flush_interval: float = LOKI_FLUSH_INTERVAL,
+        policy: str = LOKI_QUEUE_POLICY,
+        block_timeout: float = LOKI_BLOCK_TIMEOUT,
+    ):
+        super().__init__()
+        if policy not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Unknown Loki queue policy: {policy}")
+        self.emitter = LokiEmitterV1(url, tags, auth)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.failed_pushes = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="loki-shipper", daemon=True)
+        self._worker.start()
+
+    def emit(self, record: logging.LogRecord):
+        if self._closed:
+            return
+        try:
+            item = (record, self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        self._enqueue(item)
+
+    def _enqueue(self, item):
+        if self.policy == "block":
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped += 1
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            if oldest is self._STOP:
+                self._queue.put(oldest)
+                return
+            if isinstance(oldest, threading.Event):
+                oldest.set()
+            else:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            batch = [item]
+            stop = False
+            waiters = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    # A flush was requested: ship what we have right away.
+                    waiters.append(item)
+                    break
+                batch.append(item)
+            self._push(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _push(self, batch):
+        streams = {}
+        for record, line in batch:
+            tags = self.emitter.build_tags(record)
+            key = tuple(sorted((str(k), str(v)) for k, v in tags.items()))
+            stream = streams.get(key)
+            if stream is None:
+                stream = streams[key] = {"stream": dict(key), "values": []}
+            stream["values"].append([str(int(record.created * 1e9)), line])
+        payload = {"streams": list(streams.values())}
+        try:
+            resp = self.emitter.session.post(self.emitter.url, json=payload, timeout=LOKI_PUSH_TIMEOUT)
+            if resp.status_code != self.emitter.success_response_code:
+                raise ValueError(f"Unexpected Loki API response status code: {resp.status_code}")
+        except Exception:
+            self.failed_pushes += 1
+            self.handleError(batch[-1][0])
+
+    def flush(self, timeout: float | None = None):
+        """
+        Blocks until every record queued before this call has been pushed.
+
+        The wait is bounded even without a timeout: logging.shutdown() and
+        dictConfig() flush while holding the logging lock, which the worker
+        may need to finish a push.
+        """
+        if self._closed or not self._worker.is_alive():
+            return
+        if timeout is None:
+            timeout = LOKI_PUSH_TIMEOUT + self.flush_interval
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self):
+        """Pushes the remaining records and stops the worker thread."""
+        if not self._closed:
+            self._closed = True
+            if self._worker.is_alive():
+                # Bypass the drop policy so the stop marker is never lost.
+                self._queue.put(self._STOP)
+                self._worker.join(timeout=LOKI_PUSH_TIMEOUT + self.flush_interval)
+            self.emitter.close()
+        super().close()
 
 def setup_logging() -> logging.Logger:
-    """Setup logging with IST timezone and structured JSON format"""
+    """
+    Setup logging with IST timezone and structured JSON format.
+
+    Safe to call from several modules: handlers are only built on the first call.
+    """
+    global _configured
     logger = logging.getLogger("mcp-service")
+    if _configured:
+        return logger
+
     logger.setLevel(logging.INFO)
-    
+
     # Remove existing handlers
     logger.handlers = []
-    
+
     # Console handler with IST timezone
     console_handler = StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    
+
     # Use structured JSON format for application logs
-    formatter = ISTFormatter(
-        '{"timestamp": "%(asctime)s", "service": "mcp-service", '
-        '"level": "%(levelname)s", "message": "%(message)s", '
-        '"module": "%(name)s", "function": "%(funcName)s", "line": %(lineno)d}'
-    )
-    console_handler.setFormatter(formatter)    
+    formatter = ISTJSONFormatter(service="mcp-service")
+    console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
-    
+
     loki_api_url = "https://logs-prod-028.grafana.net/loki/api/v1/push"
     loki_user_id = os.getenv("LOKI_USER_ID", "your_user_id")
     loki_auth_token = os.getenv("LOKI_AUTH_TOKEN", "your_auth_token")
-    
+
     loki_tags = {
             "service": "mcp-service"
         }
-    
-    loki_handler = logging_loki.LokiHandler(
-            url=loki_api_url,
-            tags=loki_tags,
-            auth=(loki_user_id, loki_auth_token),
-            version="1",
-        )
+
+    if LOKI_SHIPPING_MODE == "sync":
+        loki_handler = logging_loki.LokiHandler(
+                url=loki_api_url,
+                tags=loki_tags,
+                auth=(loki_user_id, loki_auth_token),
+                version="1",
+            )
+    else:
+        loki_handler = BatchingLokiHandler(
+                url=loki_api_url,
+                tags=loki_tags,
+                auth=(loki_user_id, loki_auth_token),
+            )
     loki_handler.setLevel(logging.INFO)
     logger.addHandler(loki_handler)
-    
+
+    _configured = True
     return logger
 
+def shutdown_logging():
+    """Flushes queued Loki records and closes the logger's handlers."""
+    global _configured
+    logger = logging.getLogger("mcp-service")
+    for handler in list(logger.handlers):
+        try:
+            handler.flush()
+            handler.close()
+        finally:
+            logger.removeHandler(handler)
+    _configured = False
@@ -0,0 +1,262 @@
+"""Columnar store of scan findings for cross-repository analytics"""
+import os
+
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ANALYTICS_MAX_FINDINGS = int(os.getenv("ANALYTICS_MAX_FINDINGS", 5_000_000))
+
+GROUP_BY_COLUMNS = ("package", "cve", "repo", "severity", "package_manager")
+SORT_METRICS = ("count", "repos", "total_cvss", "max_cvss")
+
+class Dictionary:
+    """Maps strings to dense integer codes and back."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+def _score(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+class FindingStore:
+    """
+    Vulnerability findings of the latest scan of each repository, one NumPy array per column.
+
+    Repositories, packages, CVEs, severities and package managers are
+    dictionary-encoded as integer codes, so a finding takes 19 bytes. Adding a
+    scan replaces the repository's previous findings. Dropped rows are only
+    marked dead and are compacted away once they outnumber the live ones.
+    When more than `max_findings` are live, the repositories scanned longest
+    ago are dropped.
+
+    Appends and compaction never modify rows a query may be reading, so a
+    query can run in a worker thread on a snapshot taken on the event loop.
+    """
+
+    _DTYPES = {
+        "repo": "int32",
+        "package": "int32",
+        "cve": "int32",
+        "severity": "int8",
+        "package_manager": "int16",
+        "cvss": "float32",
+    }
+
+    def __init__(self, max_findings: int = ANALYTICS_MAX_FINDINGS):
+        if np is None:
+            raise RuntimeError("numpy is required for the analytics store")
+        self.max_findings = max_findings
+        self.dictionaries = {name: Dictionary() for name in GROUP_BY_COLUMNS}
+        self._columns = {name: np.empty(1024, dtype=dtype) for name, dtype in self._DTYPES.items()}
+        self._alive = np.zeros(1024, dtype=bool)
+        self._size = 0
+        self._live = 0
+        self._repos = OrderedDict()  # repo code -> live findings, least recently scanned first
+
+    def add_scan(self, repo: str, vulnerabilities: list[dict]):
+        """Replaces the stored findings of a repository with those of a new scan."""
+        repo_code = self.dictionaries["repo"].encode(repo)
+        if repo_code in self._repos:
+            self._drop_repo(repo_code)
+        count = len(vulnerabilities)
+        self._reserve(count)
+        rows = slice(self._size, self._size + count)
+        columns = self._columns
+        encode = {name: dictionary.encode for name, dictionary in self.dictionaries.items()}
+        columns["repo"][rows] = repo_code
+        columns["package"][rows] = np.fromiter(
+            (encode["package"](str(v.get("package_name") or "")) for v in vulnerabilities), dtype="int32", count=count)
+        columns["cve"][rows] = np.fromiter(
+            (encode["cve"](str(v.get("cve") or "")) for v in vulnerabilities), dtype="int32", count=count)
+        columns["severity"][rows] = np.fromiter(
+            (encode["severity"](str(v.get("severity") or "").lower()) for v in vulnerabilities), dtype="int8", count=count)
+        columns["package_manager"][rows] = np.fromiter(
+            (encode["package_manager"](str(v.get("package_manager") or "").lower()) for v in vulnerabilities), dtype="int16", count=count)
+        columns["cvss"][rows] = np.fromiter((_score(v.get("cvs_score")) for v in vulnerabilities), dtype="float32", count=count)
+        self._alive[rows] = True
+        self._size += count
+        self._live += count
+        self._repos[repo_code] = count
+        while self._live > self.max_findings and len(self._repos) > 1:
+            self._drop_repo(next(iter(self._repos)))
+        if self._size - self._live > max(self._live, 65536):
+            self._compact()
+
+    def _drop_repo(self, repo_code: int):
+        size = self._size
+        rows = np.flatnonzero(self._alive[:size] & (self._columns["repo"][:size] == repo_code))
+        self._alive[rows] = False
+        self._live -= len(rows)
+        del self._repos[repo_code]
+
+    def _reserve(self, count: int):
+        needed = self._size + count
+        capacity = len(self._alive)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # New arrays rather than resizing in place, so running queries keep valid views.
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _compact(self):
+        keep = self._alive[:self._size]
+        capacity = max(1024, len(self._alive))
+        for name, column in self._columns.items():
+            compacted = np.empty(capacity, dtype=column.dtype)
+            compacted[:self._live] = column[:self._size][keep]
+            self._columns[name] = compacted
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:self._live] = True
+        self._size = self._live
+
+    def snapshot(self) -> "Snapshot":
+        """Captures the live rows; cheap, and must be called on the event loop thread."""
+        size = self._size
+        return Snapshot(
+            {name: column[:size] for name, column in self._columns.items()},
+            self._alive[:size].copy(),
+            {name: (dictionary.codes, dictionary.values[:]) for name, dictionary in self.dictionaries.items()},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "repositories": len(self._repos),
+            "findings": self._live,
+            "rows": self._size,
+            "max_findings": self.max_findings,
+            "bytes": sum(column.nbytes for column in self._columns.values()) + self._alive.nbytes,
+            "distinct": {name: len(dictionary) for name, dictionary in self.dictionaries.items()},
+        }
+
+class Snapshot:
+    """A consistent view of the store that queries run against."""
+
+    def __init__(self, columns: dict, alive, dictionaries: dict):
+        self.columns = columns
+        self.alive = alive
+        self.dictionaries = dictionaries
+
+    def _codes(self, name: str, values) -> list[int]:
+        codes = self.dictionaries[name][0]
+        return [codes[value] for value in values if value in codes]
+
+    def query(
+        self,
+        group_by: str = "package",
+        metric: str = "count",
+        top_k: int = 20,
+        severities: set[str] | None = None,
+        min_cvs_score: float | None = None,
+        min_repos: int = 0,
+        repo: str = "",
+        percentiles: tuple = (50, 90, 99),
+    ) -> dict:
+        """
+        Groups the matching findings and returns the top_k groups by `metric`.
+
+        Each group has its finding count, distinct repositories, total and
+        maximum CVSS, and CVSS percentiles.
+        """
+        columns = self.columns
+        mask = self.alive.copy()
+        if severities:
+            mask &= np.isin(columns["severity"], self._codes("severity", severities))
+        if min_cvs_score is not None:
+            mask &= columns["cvss"] >= min_cvs_score
+        if repo:
+            mask &= np.isin(columns["repo"], self._codes("repo", [repo]))
+        rows = np.flatnonzero(mask)
+
+        keys = columns[group_by][rows].astype(np.int64)
+        repos = columns["repo"][rows].astype(np.int64)
+        cvss = columns["cvss"][rows]
+        group_count = len(self.dictionaries[group_by][1])
+        repo_count = len(self.dictionaries["repo"][1])
+
+        counts = np.bincount(keys, minlength=group_count)
+        scored = ~np.isnan(cvss)
+        total_cvss = np.bincount(keys[scored], weights=cvss[scored], minlength=group_count)
+        max_cvss = None
+        if metric == "max_cvss":
+            # Needed for every group only when ranking by it; otherwise just the
+            # selected groups' maximum is computed below.
+            scored_keys = keys[scored]
+            order = np.argsort(scored_keys, kind="stable")
+            sorted_keys = scored_keys[order]
+            max_cvss = np.full(group_count, -np.inf)
+            if sorted_keys.size:
+                starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+                max_cvss[sorted_keys[starts]] = np.maximum.reduceat(cvss[scored][order], starts)
+        repo_pairs = np.unique(keys * max(repo_count, 1) + repos)
+        distinct_repos = np.bincount(repo_pairs // max(repo_count, 1), minlength=group_count)
+
+        candidates = np.flatnonzero((counts > 0) & (distinct_repos >= max(min_repos, 0)))
+        ranking = {"count": counts, "repos": distinct_repos, "total_cvss": total_cvss, "max_cvss": max_cvss}[metric]
+        top_k = min(max(top_k, 1), len(candidates))
+        if top_k < len(candidates):
+            candidates = candidates[np.argpartition(-ranking[candidates], top_k - 1)[:top_k]]
+        top = candidates[np.lexsort((candidates, -ranking[candidates]))]
+
+        # Percentiles only for the selected groups: sort their scores by group once.
+        in_top = np.isin(keys, top) & scored
+        top_keys = keys[in_top]
+        order = np.argsort(top_keys, kind="stable")
+        sorted_keys = top_keys[order]
+        sorted_cvss = cvss[in_top][order]
+        values = self.dictionaries[group_by][1]
+        groups = []
+        for code in top:
+            start, end = np.searchsorted(sorted_keys, [code, code + 1])
+            scores = sorted_cvss[start:end]
+            groups.append({
+                "key": values[code],
+                "count": int(counts[code]),
+                "repos": int(distinct_repos[code]),
+                "total_cvss": round(float(total_cvss[code]), 2),
+                "max_cvss": round(float(scores.max()), 2) if scores.size else None,
+                "cvss_percentiles": {
+                    f"p{p}": round(float(v), 2) for p, v in zip(percentiles, np.percentile(scores, percentiles))
+                } if scores.size else None,
+            })
+
+        overall = cvss[scored]
+        return {
+            "groups": groups,
+            "totals": {
+                "findings": int(rows.size),
+                "repositories": int(np.count_nonzero(np.bincount(repos, minlength=1))),
+                "groups": int((counts > 0).sum()),
+                "cvss_percentiles": {
+                    f"p{p}": round(float(v), 2) for p, v in zip(percentiles, np.percentile(overall, percentiles))
+                } if overall.size else None,
+            },
+        }
+
+def create_store() -> FindingStore | None:
+    """Returns a new store, or None when numpy is not installed."""
+    return FindingStore() if np is not None else None
@@ -0,0 +1,216 @@
+"""Load balancing of backend calls across a pool of scanner backends"""
+import asyncio
+import os
+import random
+import httpx
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from config.logging_config import setup_logging
+from src.http_client import get_client
+from src.resilience import ENDPOINT_POLICIES, CircuitOpenError, send_request
+from src.scheduler import outbound_scheduler
+
+# Setup logging
+logger = setup_logging()
+
+# Comma-separated backend base URLs; API_BASE_URL is still honoured for a single backend
+API_BASE_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("API_BASE_URLS", os.getenv("API_BASE_URL", "http://localhost:8000")).split(",")
+    if url.strip()
+]
+BACKEND_HEALTH_INTERVAL = float(os.getenv("BACKEND_HEALTH_INTERVAL", 5.0))
+BACKEND_EJECT_AFTER = int(os.getenv("BACKEND_EJECT_AFTER", 2))
+BACKEND_READMIT_AFTER = int(os.getenv("BACKEND_READMIT_AFTER", 1))
+JOB_AFFINITY_MAX_ENTRIES = int(os.getenv("JOB_AFFINITY_MAX_ENTRIES", 100000))
+
+class Backend:
+    """One backend instance and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.healthy = True
+        self.failed_checks = 0
+        self.passed_checks = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+        }
+
+class BackendPool:
+    """
+    Routes backend calls to the healthy backend with the fewest outstanding requests.
+
+    A background task probes /health on every backend. A backend is ejected after
+    BACKEND_EJECT_AFTER failed probes and re-admitted after BACKEND_READMIT_AFTER
+    successful ones. If every backend is ejected, all of them are used again so
+    calls fail with the backend's own error rather than not being sent at all.
+
+    Calls about a job stick to the backend that created it. For a job this pool
+    has not seen, the backends are tried in turn until one does not answer 404.
+    """
+
+    def __init__(self, urls: list[str]):
+        if not urls:
+            raise ValueError("At least one backend URL is required")
+        self.backends = [Backend(url) for url in urls]
+        self._by_url = {backend.url: backend for backend in self.backends}
+        self._job_affinity = OrderedDict()  # job_id -> backend url
+        self._monitor = None
+
+    def choose(self, exclude: tuple = ()) -> Backend:
+        candidates = [b for b in self.backends if b.healthy and b.url not in exclude]
+        if not candidates:
+            candidates = [b for b in self.backends if b.url not in exclude] or self.backends
+        least = min(b.outstanding for b in candidates)
+        return random.choice([b for b in candidates if b.outstanding == least])
+
+    def backend_for_job(self, job_id: str) -> Backend | None:
+        url = self._job_affinity.get(job_id)
+        if url is None:
+            return None
+        self._job_affinity.move_to_end(job_id)
+        return self._by_url.get(url)
+
+    def pin_job(self, job_id: str, backend: Backend):
+        self._job_affinity[job_id] = backend.url
+        self._job_affinity.move_to_end(job_id)
+        while len(self._job_affinity) > JOB_AFFINITY_MAX_ENTRIES:
+            self._job_affinity.popitem(last=False)
+
+    def forget_job(self, job_id: str):
+        self._job_affinity.pop(job_id, None)
+
+    async def request(self, endpoint: str, method: str, path: str, job_id: str | None = None, **kwargs):
+        """
+        Sends a request to a backend chosen for this call.
+
+        The call first waits for a slot from the outbound scheduler, which may
+        reject it with AdmissionRejectedError. Returns (response, backend).
+        Pass job_id for calls about an existing job.
+        """
+        self.start()
+        async with outbound_scheduler.slot(endpoint):
+            return await self._route(endpoint, method, path, job_id, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, endpoint: str, method: str, path: str, job_id: str | None = None, **kwargs):
+        """
+        Like request, but yields (response, backend) as soon as the headers arrive.
+
+        A 200 body is left unread for the block to consume. The scheduler slot
+        and the backend's outstanding count are held until the block exits, so
+        reading a large body still counts as load on that backend. The
+        response is closed on exit.
+        """
+        self.start()
+        async with outbound_scheduler.slot(endpoint):
+            response, backend = await self._route(endpoint, method, path, job_id, stream=True, **kwargs)
+            # _send has already dropped its count; nothing can run in between.
+            backend.outstanding += 1
+            try:
+                yield response, backend
+            finally:
+                backend.outstanding -= 1
+                await response.aclose()
+
+    async def _route(self, endpoint: str, method: str, path: str, job_id: str | None, **kwargs):
+        if job_id is not None:
+            pinned = self.backend_for_job(job_id)
+            if pinned is not None:
+                return await self._send(pinned, endpoint, method, path, **kwargs), pinned
+            return await self._find_job(job_id, endpoint, method, path, **kwargs)
+        tried = ()
+        while True:
+            backend = self.choose(exclude=tried)
+            try:
+                return await self._send(backend, endpoint, method, path, **kwargs), backend
+            except CircuitOpenError:
+                # Another backend may still be healthy for this endpoint.
+                tried += (backend.url,)
+                if len(tried) >= len(self.backends):
+                    raise
+
+    async def _find_job(self, job_id: str, endpoint: str, method: str, path: str, **kwargs):
+        tried = ()
+        not_found = None
+        circuit_open = None
+        while len(tried) < len(self.backends):
+            backend = self.choose(exclude=tried)
+            tried += (backend.url,)
+            try:
+                response = await self._send(backend, endpoint, method, path, **kwargs)
+            except CircuitOpenError as e:
+                # The job may be on another backend.
+                circuit_open = e
+                continue
+            if response.status_code != 404:
+                self.pin_job(job_id, backend)
+                return response, backend
+            not_found = (response, backend)
+        # A 404 only holds if every backend was asked; the job may be on one whose circuit is open.
+        if circuit_open is not None:
+            raise circuit_open
+        return not_found
+
+    async def _send(self, backend: Backend, endpoint: str, method: str, path: str, **kwargs):
+        backend.outstanding += 1
+        try:
+            return await send_request(endpoint, method, f"{backend.url}{path}", **kwargs)
+        finally:
+            backend.outstanding -= 1
+
+    def start(self):
+        """Starts the health monitor; only needed when there is more than one backend."""
+        if len(self.backends) > 1 and (self._monitor is None or self._monitor.done()):
+            self._monitor = asyncio.create_task(self._monitor_health(), name="backend-health-monitor")
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+    async def _monitor_health(self):
+        while True:
+            await asyncio.sleep(BACKEND_HEALTH_INTERVAL)
+            await asyncio.gather(*(self.check(backend) for backend in self.backends))
+
+    async def check(self, backend: Backend):
+        """Probes one backend's /health and ejects or re-admits it."""
+        # Sent directly rather than through send_request: the probe must reach an
+        # ejected backend even while its circuit breakers are open.
+        try:
+            response = await get_client().get(
+                f"{backend.url}/health",
+                headers={"Accept": "application/json"},
+                timeout=ENDPOINT_POLICIES["health"].timeout
+            )
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            backend.failed_checks = 0
+            backend.passed_checks += 1
+            if not backend.healthy and backend.passed_checks >= BACKEND_READMIT_AFTER:
+                backend.healthy = True
+                logger.info(f"Backend re-admitted: {backend.url}")
+        else:
+            backend.passed_checks = 0
+            backend.failed_checks += 1
+            if backend.healthy and backend.failed_checks >= BACKEND_EJECT_AFTER:
+                backend.healthy = False
+                logger.warning(f"Backend ejected after {backend.failed_checks} failed health checks: {backend.url}")
+
+    def snapshot(self) -> list[dict]:
+        return [backend.snapshot() for backend in self.backends]
+
+backend_pool = BackendPool(API_BASE_URLS)
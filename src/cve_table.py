@@ -0,0 +1,100 @@
+"""Shared CVE metadata table and the compact form of vulnerability lists"""
+import os
+
+from collections import OrderedDict
+
+CVE_TABLE_MAX_ENTRIES = int(os.getenv("CVE_TABLE_MAX_ENTRIES", 100_000))
+
+# Properties of a CVE itself, the same in every file and repository it is found in
+CVE_FIELDS = ("cvs_score", "description", "severity")
+
+class CveTable:
+    """
+    Metadata of the CVEs seen in backend responses, keyed by CVE id.
+
+    `intern` points each vulnerability's CVE fields at the table's copy of the
+    values, so a description repeated across many files, repositories and
+    cached results is held in memory once. When a response carries a value
+    that differs from the table's, the table takes the newer value. The least
+    recently seen CVEs are evicted once there are more than `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = CVE_TABLE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.shared = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # cve -> {field: value}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, cve: str) -> dict | None:
+        entry = self._entries.get(cve)
+        return dict(entry) if entry is not None else None
+
+    def intern(self, vulnerabilities: list) -> int:
+        """
+        Records the CVEs of a list of vulnerabilities and shares their values, in place.
+
+        Returns the number of field values replaced by the table's copy.
+        """
+        if self.max_entries <= 0:
+            return 0
+        entries = self._entries
+        shared = 0
+        for vulnerability in vulnerabilities:
+            if not isinstance(vulnerability, dict):
+                continue
+            cve = vulnerability.get("cve")
+            if not cve or not isinstance(cve, str):
+                continue
+            entry = entries.get(cve)
+            if entry is None:
+                entries[cve] = {field: vulnerability[field] for field in CVE_FIELDS if field in vulnerability}
+                if len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+                continue
+            entries.move_to_end(cve)
+            for field in CVE_FIELDS:
+                if field not in vulnerability:
+                    continue
+                value = vulnerability[field]
+                known = entry.get(field)
+                if value is known:
+                    continue
+                if value == known:
+                    vulnerability[field] = known
+                    shared += 1
+                else:
+                    entry[field] = value
+        self.shared += shared
+        return shared
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "shared_values": self.shared,
+            "evictions": self.evictions,
+        }
+
+def compact_vulnerabilities(vulnerabilities: list, cves: dict | None = None) -> tuple[list, dict]:
+    """
+    Moves the CVE fields out of each vulnerability into a table keyed by CVE id.
+
+    Returns (rows, cves): the vulnerabilities without CVE fields, and the CVE
+    fields of each CVE, taken from its first occurrence. Pass `cves` to add to
+    an existing table. Vulnerabilities without a CVE id are kept whole.
+    """
+    cves = {} if cves is None else cves
+    rows = []
+    for vulnerability in vulnerabilities:
+        cve = vulnerability.get("cve") if isinstance(vulnerability, dict) else None
+        if not cve or not isinstance(cve, str):
+            rows.append(vulnerability)
+            continue
+        if cve not in cves:
+            cves[cve] = {field: vulnerability[field] for field in CVE_FIELDS if field in vulnerability}
+        rows.append({key: value for key, value in vulnerability.items() if key not in CVE_FIELDS})
+    return rows, cves
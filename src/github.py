@@ -0,0 +1,62 @@
+"""GitHub helpers used to resolve repository state without cloning"""
+import os
+import re
+
+from config.logging_config import setup_logging
+from src.resilience import BackendError, send_request
+
+# Setup logging
+logger = setup_logging()
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+_REPO_PATTERN = re.compile(
+    r"^(?:https?://(?:[^@/]+@)?github\.com/|git@github\.com:|ssh://git@github\.com/)"
+    r"(?P<owner>[^/]+)/(?P<repo>[^/]+?)(?:\.git)?/?$"
+)
+
+def parse_github_repo(repo_url: str) -> tuple[str, str] | None:
+    """Returns (owner, repo) for a github.com URL, or None for any other host."""
+    match = _REPO_PATTERN.match(repo_url.strip())
+    if not match:
+        return None
+    return match.group("owner"), match.group("repo")
+
+def normalize_repo_url(repo_url: str) -> str:
+    """Maps the different spellings of a repository URL onto one key."""
+    parsed = parse_github_repo(repo_url)
+    if parsed:
+        owner, repo = parsed
+        return f"github.com/{owner.lower()}/{repo.lower()}"
+    url = repo_url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    return url
+
+async def resolve_head_commit(repo_url: str, github_pat: str) -> str | None:
+    """
+    Resolves the commit SHA of the default branch HEAD through the GitHub API.
+
+    The lookup is made with the caller's token, so it also confirms the caller
+    can read the repository. Returns None when the repository is not on
+    github.com or the lookup fails.
+    """
+    parsed = parse_github_repo(repo_url)
+    if not parsed:
+        return None
+    owner, repo = parsed
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/HEAD"
+    headers = {
+        "Accept": "application/vnd.github.sha",
+    }
+    if github_pat:
+        headers["Authorization"] = f"Bearer {github_pat}"
+    try:
+        response = await send_request("github", "GET", api_url, headers=headers)
+    except BackendError as e:
+        logger.warning(f"BackendError resolving HEAD commit for repo: {repo_url} - {str(e)}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Could not resolve HEAD commit for repo: {repo_url} - {response.status_code}")
+        return None
+    return response.text.strip() or None
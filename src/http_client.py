@@ -0,0 +1,58 @@
+"""Shared async HTTP client used by the Dependency Scanner tools"""
+import os
+import httpx
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from config.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+
+# httpx decodes zstd only when the zstandard package is installed
+ACCEPT_ENCODING = "zstd, gzip" if zstandard is not None else "gzip"
+
+_client: httpx.AsyncClient | None = None
+
+def open_client() -> httpx.AsyncClient:
+    """
+    Creates the shared client with a keep-alive connection pool.
+
+    Responses are requested compressed: zstd when zstandard is installed, else gzip.
+
+    Calling this again while a client is open returns the existing client.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        _client = httpx.AsyncClient(limits=limits, timeout=None, headers={"Accept-Encoding": ACCEPT_ENCODING})
+        logger.info(
+            f"Opened shared HTTP client (max_connections={HTTP_MAX_CONNECTIONS}, "
+            f"max_keepalive={HTTP_MAX_KEEPALIVE_CONNECTIONS}, accept_encoding={ACCEPT_ENCODING})"
+        )
+    return _client
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared client, opening it on first use."""
+    if _client is None or _client.is_closed:
+        return open_client()
+    return _client
+
+async def close_client():
+    """Closes the shared client and releases its pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed shared HTTP client")
+    _client = None
@@ -0,0 +1,115 @@
+"""Registry that wakes job waiters when a completion callback arrives"""
+import asyncio
+import os
+import time
+
+from src.shared_state import SHARED_POLL_INTERVAL, shared_state
+
+# Route on this service that the backend calls when a job changes state
+JOB_CALLBACK_PATH = "/callbacks/jobs"
+
+# Public base URL of this service as seen by the backend; callbacks are off when unset
+JOB_CALLBACK_BASE_URL = os.getenv("JOB_CALLBACK_BASE_URL", "").rstrip("/")
+
+# Shared secret the backend must echo in the X-Callback-Token header
+JOB_CALLBACK_SECRET = os.getenv("JOB_CALLBACK_SECRET", "")
+
+# How long a callback is remembered for waiters that start slightly after it
+RECENT_NOTIFICATION_SECONDS = 60.0
+
+class JobEventRegistry:
+    """
+    Lets tasks waiting on a job sleep until the backend reports a change.
+
+    publish() is called by the job callback route; wait() returns as soon as a
+    notification for the job arrives or the timeout passes, whichever is first.
+
+    With a shared store, a callback received by one worker process also wakes
+    the waiters of the others: it is published to the store, and each worker
+    polls the store for new notifications while callbacks are enabled.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        self._events = {}  # job_id -> [asyncio.Event, waiter count]
+        self._recent = {}  # job_id -> monotonic time of the last notification
+        self._relay_task = None
+        self.notifications = 0
+
+    async def publish(self, job_id: str):
+        """Notifies the waiters for job_id in this process and, with a shared store, in the others."""
+        self.notify(job_id)
+        if self.shared is not None:
+            await self.shared.publish(f"job:{job_id}")
+
+    def notify(self, job_id: str):
+        self.notifications += 1
+        self._wake(job_id)
+
+    def _wake(self, job_id: str):
+        now = time.monotonic()
+        self._recent[job_id] = now
+        if len(self._recent) > 1024:
+            cutoff = now - RECENT_NOTIFICATION_SECONDS
+            self._recent = {k: t for k, t in self._recent.items() if t >= cutoff}
+        # Later waiters get a fresh event instead of one that is already set.
+        entry = self._events.pop(job_id, None)
+        if entry is not None:
+            entry[0].set()
+
+    async def wait(self, job_id: str, timeout: float, since: float) -> bool:
+        """
+        Waits for a notification about job_id received after `since`.
+
+        Returns True if one arrived, False if the timeout passed first.
+        """
+        if self._recent.get(job_id, float("-inf")) > since:
+            return True
+        if self.shared is not None and callbacks_enabled():
+            self._start_relay()
+        entry = self._events.get(job_id)
+        if entry is None:
+            entry = self._events[job_id] = [asyncio.Event(), 0]
+        entry[1] += 1
+        try:
+            await asyncio.wait_for(entry[0].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            entry[1] -= 1
+            if entry[1] <= 0 and self._events.get(job_id) is entry:
+                del self._events[job_id]
+
+    def waiting(self) -> int:
+        return sum(entry[1] for entry in self._events.values())
+
+    def _start_relay(self):
+        if self._relay_task is None or self._relay_task.done():
+            self._relay_task = asyncio.get_running_loop().create_task(self._relay(), name="job-event-relay")
+
+    async def _relay(self):
+        """Wakes local waiters for the notifications other workers publish."""
+        seq = await self.shared.last_event()
+        while True:
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            for seq, topic in await self.shared.events_after(seq):
+                if topic.startswith("job:"):
+                    self._wake(topic[4:])
+
+    async def stop(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except asyncio.CancelledError:
+                pass
+            self._relay_task = None
+
+def callbacks_enabled() -> bool:
+    return bool(JOB_CALLBACK_BASE_URL)
+
+def callback_url() -> str:
+    return f"{JOB_CALLBACK_BASE_URL}{JOB_CALLBACK_PATH}"
+
+job_events = JobEventRegistry(shared=shared_state)
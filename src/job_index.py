@@ -0,0 +1,156 @@
+"""Local SQLite index of scan-and-fix jobs"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.jobs import is_terminal_status
+
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "job_index.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    repo_url TEXT,
+    created_at TEXT,
+    completed_at TEXT,
+    terminal INTEGER NOT NULL DEFAULT 0,
+    detailed INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_repo_url ON jobs (repo_url);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_terminal_synced ON jobs (terminal, synced_at);
+"""
+
+class JobIndex:
+    """
+    Persistent index of the jobs this service has seen.
+
+    Rows are filled from scan-and-fix, job status and job list responses. A row
+    is "detailed" once a full job status response has been stored in it, until
+    a summary with a different status arrives, since the stored result belongs
+    to the earlier status. A job in a terminal status never changes again, so
+    its detailed copy can be served without asking the backend. Queries run in
+    a worker thread so the event loop is never blocked on disk I/O.
+    """
+
+    def __init__(self, path: str = JOB_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        """Opens the database on first use; callers must hold the lock."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            with conn:
+                if self.path != ":memory:":
+                    conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def upsert(self, jobs: list[dict], detailed: bool = False):
+        """Inserts jobs or merges the given fields into the stored copies."""
+        jobs = [job for job in jobs if job.get("id")]
+        if jobs:
+            await asyncio.to_thread(self._upsert, jobs, detailed)
+
+    def _upsert(self, jobs: list[dict], detailed: bool):
+        now = time.time()
+        with self._lock, self._db() as db:
+            for job in jobs:
+                row = db.execute("SELECT data, detailed FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+                stored = json.loads(row["data"]) if row else {}
+                if is_terminal_status(stored.get("status")) and not is_terminal_status(job.get("status")):
+                    # An older listing must not move a finished job back to running.
+                    continue
+                data = {**stored, **job}
+                db.execute(
+                    "INSERT OR REPLACE INTO jobs (id, status, repo_url, created_at, completed_at, terminal, detailed, synced_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        data["id"],
+                        data.get("status"),
+                        data.get("repo_url"),
+                        data.get("created_at"),
+                        data.get("completed_at"),
+                        int(is_terminal_status(data.get("status"))),
+                        int(detailed or bool(row and row["detailed"] and stored.get("status") == data.get("status"))),
+                        now,
+                        json.dumps(data, default=str),
+                    ),
+                )
+
+    async def get_finished(self, job_id: str) -> dict | None:
+        """Returns the stored job if it is terminal and detailed, otherwise None."""
+        return await asyncio.to_thread(self._get_finished, job_id)
+
+    def _get_finished(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT data FROM jobs WHERE id = ? AND terminal = 1 AND detailed = 1", (job_id,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    async def delete(self, job_id: str):
+        await asyncio.to_thread(self._delete, job_id)
+
+    def _delete(self, job_id: str):
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    async def stale_active_ids(self, repo_url: str, older_than: float) -> list[str]:
+        """Returns non-terminal jobs, optionally for one repository, last synced before `older_than`."""
+        return await asyncio.to_thread(self._stale_active_ids, repo_url, older_than)
+
+    def _stale_active_ids(self, repo_url: str, older_than: float) -> list[str]:
+        where, params = self._filters("", repo_url)
+        where.append("terminal = 0")
+        where.append("synced_at < ?")
+        params.append(older_than)
+        with self._lock:
+            rows = self._db().execute(f"SELECT id FROM jobs WHERE {' AND '.join(where)}", params).fetchall()
+        return [row["id"] for row in rows]
+
+    async def query(self, page: int, limit: int, status: str = "", repo_url: str = "") -> tuple[list[dict], int]:
+        """Returns (jobs on the page, total matching jobs), newest first."""
+        return await asyncio.to_thread(self._query, page, limit, status, repo_url)
+
+    def _query(self, page: int, limit: int, status: str, repo_url: str) -> tuple[list[dict], int]:
+        where, params = self._filters(status, repo_url)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM jobs {clause}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT data FROM jobs {clause} ORDER BY created_at DESC, id LIMIT ? OFFSET ?",
+                params + [limit, (page - 1) * limit],
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows], total
+
+    @staticmethod
+    def _filters(status: str, repo_url: str) -> tuple[list[str], list]:
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if repo_url:
+            where.append("repo_url = ?")
+            params.append(repo_url)
+        return where, params
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+job_index = JobIndex()
@@ -0,0 +1,13 @@
+"""Scan-and-fix job status helpers"""
+
+# Statuses reported by /api/v1/jobs for jobs that are still waiting or running
+ACTIVE_JOB_STATUSES = frozenset({"queued", "pending", "running", "processing", "in_progress"})
+
+# Statuses after which a job never changes again
+TERMINAL_JOB_STATUSES = frozenset({"completed", "failed", "cancelled", "canceled", "error"})
+
+def is_active_status(status) -> bool:
+    return str(status or "").lower() in ACTIVE_JOB_STATUSES
+
+def is_terminal_status(status) -> bool:
+    return str(status or "").lower() in TERMINAL_JOB_STATUSES
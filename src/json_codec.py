@@ -0,0 +1,116 @@
+"""JSON encoding and decoding of backend payloads, using orjson and ijson when installed"""
+import json
+import os
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Decode large responses from the stream instead of reading the whole body first
+JSON_STREAM_DECODE = os.getenv("JSON_STREAM_DECODE", "true").lower() in ("1", "true", "yes")
+
+# ijson's pure-Python backend is much slower than a full orjson/json parse, so
+# streaming is only used with one of its compiled backends.
+STREAMING_AVAILABLE = ijson is not None and ijson.backend in ("yajl2_c", "yajl2_cffi")
+
+def loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(value) -> bytes:
+    """Compact JSON encoding; values JSON cannot represent are converted with str()."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+def decode_response(response):
+    """Decodes a fully read response body."""
+    return loads(response.content)
+
+# Whitespace JSON allows before a value
+_JSON_WHITESPACE = b" \t\n\r"
+
+class _StreamReader:
+    """Async file-like view of a streamed response body for ijson."""
+
+    def __init__(self, response):
+        self._chunks = response.aiter_bytes()
+        self._buffer = b""
+
+    async def first_byte(self) -> bytes:
+        """Returns the first non-whitespace byte of the body without consuming it, or b"" if there is none."""
+        while not self._buffer.lstrip(_JSON_WHITESPACE):
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return b""
+        return self._buffer.lstrip(_JSON_WHITESPACE)[:1]
+
+    async def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+async def decode_response_stream(response):
+    """
+    Decodes a streamed response whose body is a JSON object.
+
+    With a compiled ijson backend the object's members are built while the
+    body arrives, so the raw body is never held in memory in full; the peak
+    stays close to the size of the decoded result. Otherwise the body is read
+    and decoded with stdlib json, whose transient peak is far below orjson's.
+    The caller still owns the response and must close it.
+
+    Raises:
+        ValueError: If the body is not valid JSON or is not a JSON object.
+    """
+    if not (JSON_STREAM_DECODE and STREAMING_AVAILABLE):
+        await response.aread()
+        result = json.loads(response.content)
+        if not isinstance(result, dict):
+            raise ValueError(f"Response body is a JSON {type(result).__name__}, not an object")
+        return result
+    reader = _StreamReader(response)
+    # kvitems would silently yield nothing for any other top-level value.
+    if await reader.first_byte() != b"{":
+        raise ValueError("Response body is not a JSON object")
+    result = {}
+    try:
+        async for key, value in ijson.kvitems_async(
+            reader, "", use_float=True, map_type=_InternedKeysDict
+        ):
+            result[key] = value
+    except ijson.JSONError as e:
+        # Raised as ValueError, like json and orjson do for malformed input.
+        raise ValueError(f"Invalid JSON in response body: {e}") from e
+    return result
+
+class _InternedKeysDict(dict):
+    """
+    JSON object type for ijson that shares key strings between objects.
+
+    ijson creates new key strings for every object, while json and orjson reuse
+    them. Interning them as each object is built, rather than afterwards, keeps
+    the duplicates from ever being alive at once; without it a decoded scan
+    result takes about half as much memory again.
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, sys.intern(key), value)
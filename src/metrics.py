@@ -0,0 +1,313 @@
+"""Prometheus-format metrics for tool calls, backend requests and the event loop"""
+import asyncio
+import functools
+import math
+import os
+import time
+import weakref
+
+from collections import defaultdict
+from config.logging_config import setup_logging
+from src.slow_calls import add_backend_bytes, slow_calls
+
+# Setup logging
+logger = setup_logging()
+
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", 0.5))
+# In worker mode, how often each worker publishes its metrics for /metrics served by the others
+METRICS_SHARE_INTERVAL = float(os.getenv("METRICS_SHARE_INTERVAL", 5.0))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _rows(own: dict, workers: dict | None):
+    """
+    Yields (extra label, labels, value) for a metric's series.
+
+    `workers` maps a worker id to that worker's snapshot of the metric; without
+    it the process's own series are rendered with no worker label.
+    """
+    if workers is None:
+        for labels, value in sorted(own.items()):
+            yield "", labels, value
+        return
+    for worker in sorted(workers):
+        for labels, value in workers[worker]:
+            yield f'worker="{_escape(worker)}"', tuple(labels), value
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = defaultdict(float)
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] += amount
+
+    def snapshot(self) -> list:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def render(self, workers: dict | None = None) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for worker, labels, value in _rows(self._values, workers):
+            lines.append(f"{self.name}{_labels(self.label_names, labels, worker)} {_number(value)}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, *labels, amount: float = 1.0):
+        self._values[labels] -= amount
+
+    def render(self, workers: dict | None = None) -> list[str]:
+        lines = super().render(workers)
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def snapshot(self) -> list:
+        return [[list(labels), series] for labels, series in self._series.items()]
+
+    def render(self, workers: dict | None = None) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for worker, labels, series in _rows(self._series, workers):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = ",".join(filter(None, [worker, 'le="' + _number(bound) + '"']))
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels, worker)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels, worker)} {series[-1]}")
+        return lines
+
+class Metrics:
+    """
+    The service's metrics and the /metrics text rendering.
+
+    Counters and histograms are plain dict updates on the event loop thread,
+    so recording costs well under a microsecond. The parts that cost more,
+    per-phase backend timing and the event loop lag sampler, only start once
+    /metrics has been scraped for the first time.
+    """
+
+    def __init__(self):
+        self.tool_calls = Counter("mcp_tool_calls_total", "Tool calls.", ("tool",))
+        self.tool_errors = Counter("mcp_tool_errors_total", "Tool calls that returned an error, by error code.", ("tool", "code"))
+        self.tool_duration = Histogram("mcp_tool_duration_seconds", "Tool call latency.", ("tool",))
+        self.tool_in_flight = Gauge("mcp_tool_calls_in_flight", "Tool calls in progress.", ("tool",))
+        self.backend_requests = Counter("backend_requests_total", "Backend requests, by response status.", ("endpoint", "status"))
+        self.backend_duration = Histogram(
+            "backend_request_phase_seconds",
+            "Backend request duration by phase: connect, ttfb (request sent to response headers), body and total.",
+            ("endpoint", "phase")
+        )
+        self.backend_response_bytes = Histogram("backend_response_bytes", "Backend response body size as received, before decompression.", ("endpoint",), BYTES_BUCKETS)
+        self.backend_in_flight = Gauge("backend_requests_in_flight", "Backend requests in progress.", ("endpoint",))
+        self.loop_lag = Histogram("event_loop_lag_seconds", "How late periodic event loop wake-ups ran.", (), LAG_BUCKETS)
+        self.scraped = False
+        self._lag_task = None
+        self._streaming = weakref.WeakKeyDictionary()  # streamed response -> (trace, start time)
+
+    def _all(self) -> list:
+        return [
+            self.tool_calls, self.tool_errors, self.tool_duration, self.tool_in_flight,
+            self.backend_requests, self.backend_duration, self.backend_response_bytes, self.backend_in_flight,
+            self.loop_lag,
+        ]
+
+    def render(self, workers: dict | None = None) -> str:
+        """
+        Returns every metric in the Prometheus text format and enables the lazy collectors.
+
+        Pass `workers`, a worker id -> snapshot() map, to render the series of
+        several worker processes, each with a "worker" label.
+        """
+        self.enable()
+        lines = []
+        for metric in self._all():
+            if workers is None:
+                lines.extend(metric.render())
+            else:
+                lines.extend(metric.render({worker: snapshot.get(metric.name, []) for worker, snapshot in workers.items()}))
+        return "\n".join(lines) + "\n"
+
+    def enable(self):
+        """Starts the collectors that only run once metrics are wanted."""
+        self.scraped = True
+        self._start_lag_sampler()
+
+    def snapshot(self) -> dict:
+        """Returns the values of every metric in a JSON-serialisable form."""
+        return {metric.name: metric.snapshot() for metric in self._all()}
+
+    async def render_workers(self, store, worker: str) -> str:
+        """Publishes this worker's metrics, then renders those of every live worker."""
+        await self.share(store, worker)
+        return self.render(await store.items("metrics"))
+
+    async def share(self, store, worker: str):
+        await store.put("metrics", worker, self.snapshot(), 3 * METRICS_SHARE_INTERVAL)
+
+    async def share_forever(self, store, worker: str):
+        """Publishes this worker's metrics every METRICS_SHARE_INTERVAL seconds; run it as a task."""
+        self.enable()
+        while True:
+            try:
+                await self.share(store, worker)
+            except Exception as e:
+                logger.error(f"Publishing metrics of worker {worker} failed - {str(e)}")
+            await asyncio.sleep(METRICS_SHARE_INTERVAL)
+
+    def _start_lag_sampler(self):
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._sample_loop_lag(), name="loop-lag-sampler")
+
+    async def _sample_loop_lag(self):
+        while True:
+            expected = time.monotonic() + METRICS_LOOP_LAG_INTERVAL
+            await asyncio.sleep(METRICS_LOOP_LAG_INTERVAL)
+            self.loop_lag.observe(max(0.0, time.monotonic() - expected))
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    def backend_trace(self) -> "BackendTrace | None":
+        """Returns a per-request phase recorder, or None until the first scrape."""
+        return BackendTrace() if self.scraped else None
+
+    def observe_backend(self, endpoint: str, response, elapsed: float, trace: "BackendTrace | None"):
+        self.backend_requests.inc(endpoint, str(response.status_code))
+        if not response.is_stream_consumed:
+            # The body is still to be read; whoever reads it calls observe_backend_body,
+            # which records the size, the total and the phases including the body.
+            self._streaming[response] = (trace, time.perf_counter() - elapsed)
+            return
+        self._observe_response(endpoint, response.num_bytes_downloaded, elapsed, trace)
+
+    def observe_backend_body(self, endpoint: str, response):
+        """Records a streamed response once its body has been read or abandoned."""
+        trace, started = self._streaming.pop(response, (None, None))
+        elapsed = time.perf_counter() - started if started is not None else None
+        self._observe_response(endpoint, response.num_bytes_downloaded, elapsed, trace)
+
+    def _observe_response(self, endpoint: str, size: int, elapsed: float | None, trace: "BackendTrace | None"):
+        self.backend_response_bytes.observe(size, endpoint)
+        add_backend_bytes(size)
+        if elapsed is not None:
+            self.backend_duration.observe(elapsed, endpoint, "total")
+        if trace is not None:
+            for phase, seconds in trace.phases().items():
+                self.backend_duration.observe(seconds, endpoint, phase)
+
+    def observe_backend_failure(self, endpoint: str, error: Exception, elapsed: float):
+        self.backend_requests.inc(endpoint, type(error).__name__)
+        self.backend_duration.observe(elapsed, endpoint, "total")
+
+class BackendTrace:
+    """Collects httpcore trace events of one request; pass `callback` as the "trace" extension."""
+
+    __slots__ = ("_started", "_durations")
+
+    # httpcore event name -> phase it counts towards
+    _PHASES = {
+        "connection.connect_tcp": "connect",
+        "connection.start_tls": "connect",
+        "http11.send_request_headers": "ttfb",
+        "http11.send_request_body": "ttfb",
+        "http11.receive_response_headers": "ttfb",
+        "http2.send_request_headers": "ttfb",
+        "http2.send_request_body": "ttfb",
+        "http2.receive_response_headers": "ttfb",
+        "http11.receive_response_body": "body",
+        "http2.receive_response_body": "body",
+    }
+
+    def __init__(self):
+        self._started = {}
+        self._durations = {}
+
+    async def callback(self, event: str, info: dict):
+        step, _, stage = event.rpartition(".")
+        phase = self._PHASES.get(step)
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[step] = time.perf_counter()
+        elif step in self._started:
+            elapsed = time.perf_counter() - self._started.pop(step)
+            self._durations[phase] = self._durations.get(phase, 0.0) + elapsed
+
+    def phases(self) -> dict:
+        # A reused keep-alive connection has no connect phase; report it as zero.
+        return {"connect": 0.0, **self._durations}
+
+def _error_code(result) -> str | None:
+    if isinstance(result, dict) and result.get("status") == "error":
+        return str(result.get("code", "unknown"))
+    return None
+
+def instrument_tool(fn):
+    """Wraps a tool function to record calls, error codes, latency and in-flight count, and to capture slow calls."""
+    tool = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        metrics.tool_calls.inc(tool)
+        metrics.tool_in_flight.inc(tool)
+        started = time.perf_counter()
+        code = None
+        try:
+            with slow_calls.track(tool, kwargs) as outcome:
+                result = outcome.result = await fn(*args, **kwargs)
+            code = _error_code(result)
+            return result
+        except Exception:
+            code = "exception"
+            raise
+        finally:
+            metrics.tool_duration.observe(time.perf_counter() - started, tool)
+            metrics.tool_in_flight.dec(tool)
+            if code is not None:
+                metrics.tool_errors.inc(tool, code)
+
+    return wrapper
+
+metrics = Metrics()
@@ -0,0 +1,162 @@
+"""Server-side filtering, projection and cursor paging of scan results"""
+import base64
+import binascii
+import json
+import secrets
+
+from src.cache import TTLCache
+
+VULNERABILITY_FIELDS = (
+    "current_version",
+    "cve",
+    "cvs_score",
+    "description",
+    "file_path",
+    "package_manager",
+    "package_name",
+    "safe_version",
+    "severity",
+)
+
+class CursorError(ValueError):
+    """Raised for a cursor that is malformed (code 422) or whose view has expired (code 410)."""
+
+    def __init__(self, message: str, code: int = 422):
+        super().__init__(message)
+        self.code = code
+
+def parse_severities(severity: str) -> set[str]:
+    """Parses a comma-separated severity filter such as "high,critical"."""
+    return {part.strip().lower() for part in severity.split(",") if part.strip()}
+
+def filter_vulnerabilities(
+    vulnerabilities: list,
+    severities: set[str] | None = None,
+    min_cvs_score: float | None = None,
+    package_manager: str = "",
+    file_path_prefix: str = "",
+) -> list:
+    """Returns the vulnerabilities that pass every filter that is set."""
+    package_manager = package_manager.lower()
+    matched = []
+    for vulnerability in vulnerabilities:
+        if severities and str(vulnerability.get("severity") or "").lower() not in severities:
+            continue
+        if min_cvs_score is not None and (vulnerability.get("cvs_score") or 0.0) < min_cvs_score:
+            continue
+        if package_manager and str(vulnerability.get("package_manager") or "").lower() != package_manager:
+            continue
+        if file_path_prefix and not str(vulnerability.get("file_path") or "").startswith(file_path_prefix):
+            continue
+        matched.append(vulnerability)
+    return matched
+
+def project(vulnerabilities: list, fields: list[str] | None) -> list:
+    """Keeps only the requested fields of each vulnerability."""
+    if not fields:
+        return vulnerabilities
+    return [{field: vulnerability.get(field) for field in fields} for vulnerability in vulnerabilities]
+
+class ViewStore:
+    """
+    Holds filtered scan results so later pages are served without a rescan.
+
+    A view is the filtered list of one scan plus its projection, page size and
+    whether pages are returned in compact form.
+    Cursors are opaque tokens naming a view and an offset into it, so fetching
+    a page costs time proportional to the page size only. The methods are
+    async so SharedViewStore can be used in its place.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self._views = TTLCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    async def create(self, scan: dict, items: list, fields: list[str] | None, page_size: int, compact: bool = False) -> str | None:
+        """Stores a view and returns its id, or None if it does not fit."""
+        view_id = secrets.token_urlsafe(12)
+        view = {
+            "scan": scan,
+            "matched_count": len(items),
+            "items": items,
+            "fields": fields,
+            "page_size": page_size,
+            "compact": compact,
+        }
+        if not self._views.put(view_id, view):
+            return None
+        return view_id
+
+    async def page(self, view_id: str, offset: int) -> tuple[dict, list, int | None]:
+        """Returns (view, page items, next offset or None)."""
+        view = self._views.get(view_id)
+        if view is None:
+            raise CursorError("Cursor has expired; run the scan again.", code=410)
+        end = offset + view["page_size"]
+        items = project(view["items"][offset:end], view["fields"])
+        next_offset = end if end < len(view["items"]) else None
+        return view, items, next_offset
+
+    def stats(self) -> dict:
+        return self._views.stats()
+
+class SharedViewStore:
+    """
+    ViewStore kept in the shared store, so any worker can serve a cursor.
+
+    A view is split into pages when it is created, each already projected, so
+    reading a page decodes only that page. The first page is returned by the
+    call that creates the view and is not stored.
+    """
+
+    NAMESPACE = "view"
+
+    def __init__(self, store, max_bytes: int, ttl_seconds: float):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    async def create(self, scan: dict, items: list, fields: list[str] | None, page_size: int, compact: bool = False) -> str | None:
+        """Stores a view and returns its id, or None if it does not fit."""
+        view_id = secrets.token_urlsafe(12)
+        view = {
+            "scan": scan,
+            "matched_count": len(items),
+            "page_size": page_size,
+            "compact": compact,
+        }
+        entries = [(view_id, view)]
+        for start in range(page_size, len(items), page_size):
+            entries.append((f"{view_id}/{start // page_size}", project(items[start:start + page_size], fields)))
+        if not await self.store.put_many(self.NAMESPACE, entries, self.ttl_seconds, self.max_bytes):
+            return None
+        return view_id
+
+    async def page(self, view_id: str, offset: int) -> tuple[dict, list, int | None]:
+        """Returns (view, page items, next offset or None)."""
+        view = await self.store.get(self.NAMESPACE, view_id)
+        if view is None:
+            raise CursorError("Cursor has expired; run the scan again.", code=410)
+        page_size = view["page_size"]
+        if offset % page_size:
+            raise CursorError("Malformed cursor.")
+        items = await self.store.get(self.NAMESPACE, f"{view_id}/{offset // page_size}") if offset else None
+        if items is None:
+            raise CursorError("Cursor has expired; run the scan again.", code=410)
+        end = offset + page_size
+        next_offset = end if end < view["matched_count"] else None
+        return view, items, next_offset
+
+def encode_cursor(view_id: str, offset: int) -> str:
+    raw = json.dumps({"v": view_id, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        view_id, offset = data["v"], int(data["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise CursorError("Malformed cursor.")
+    if not isinstance(view_id, str) or offset < 0:
+        raise CursorError("Malformed cursor.")
+    return view_id, offset
@@ -0,0 +1,97 @@
+"""Backend probes answered from memory and refreshed in the background"""
+import asyncio
+import time
+
+from datetime import datetime, timezone
+from config.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+class CachedProbe:
+    """
+    Keeps the latest result of a backend probe such as /health.
+
+    The first call fetches inline and starts a background task that refreshes
+    the result every `refresh_interval` seconds. Later calls are answered from
+    memory, including an error recorded by the last refresh, so callers fail
+    fast while the backend is down. If the refresher falls more than `max_age`
+    seconds behind, the next call refreshes inline.
+    """
+
+    def __init__(self, name: str, fetch, refresh_interval: float, timeout: float, max_age: float | None = None):
+        self.name = name
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.max_age = max_age if max_age is not None else 3 * refresh_interval
+        self._result = None
+        self._fetched_at = None
+        self._last_success_at = None
+        self._task = None
+        self._refreshing = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"{self.name}-probe")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Background {self.name} probe failed - {str(e)}")
+
+    async def refresh(self):
+        """Runs the probe once; concurrent callers share the same run."""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._probe())
+        task = self._refreshing
+        try:
+            await asyncio.shield(task)
+        finally:
+            if self._refreshing is task and task.done():
+                self._refreshing = None
+
+    async def _probe(self):
+        try:
+            result = await asyncio.wait_for(self.fetch(), self.timeout)
+        except asyncio.TimeoutError:
+            result = {
+                "status": "error",
+                "code": 504,
+                "message": f"{self.name} probe timed out after {self.timeout} seconds"
+            }
+        except Exception as e:
+            # Recorded like any other failure, so callers get an error result
+            # rather than the exception, and there is always a result to serve.
+            logger.error(f"{self.name} probe failed - {str(e)}")
+            result = {
+                "status": "error",
+                "code": 500,
+                "message": f"{self.name} probe failed: {str(e)}"
+            }
+        self._result = result
+        self._fetched_at = time.monotonic()
+        if not (isinstance(result, dict) and result.get("status") == "error" and "code" in result):
+            self._last_success_at = datetime.now(timezone.utc).isoformat()
+
+    async def get(self) -> dict:
+        self.start()
+        if self._result is None or time.monotonic() - self._fetched_at > self.max_age:
+            await self.refresh()
+        return {
+            **self._result,
+            "cache_age_seconds": round(time.monotonic() - self._fetched_at, 3),
+            "last_success_at": self._last_success_at
+        }
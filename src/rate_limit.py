@@ -0,0 +1,33 @@
+"""Token bucket limiting how often calls may start"""
+import asyncio
+import time
+
+class RateLimiter:
+    """
+    Lets calls start at `rate` per second on average, with bursts of up to `burst`.
+
+    Callers wait their turn in arrival order. A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a call may start."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+
@@ -0,0 +1,248 @@
+"""Timeouts, retries and circuit breakers shared by every backend call"""
+import asyncio
+import os
+import random
+import time
+import httpx
+
+from config.logging_config import setup_logging
+from src.http_client import get_client
+from src.metrics import metrics
+from src.slow_calls import add_backend_call, add_phase
+
+# Setup logging
+logger = setup_logging()
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE"})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", 0.2))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", 5.0))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30.0))
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", 1))
+
+class BackendError(Exception):
+    """A backend call that produced no usable response. `code` is the status reported to the caller."""
+
+    code = 500
+
+class BackendTimeoutError(BackendError):
+    code = 504
+
+class CircuitOpenError(BackendError):
+    code = 503
+
+class InvalidResponseError(BackendError):
+    """A successful response whose body is not valid JSON."""
+
+    code = 502
+
+class EndpointPolicy:
+    """Timeouts and retry budget for one backend endpoint."""
+
+    def __init__(self, name: str, connect_timeout: float, read_timeout: float, retries: int):
+        prefix = f"BACKEND_{name.upper()}"
+        self.name = name
+        self.connect_timeout = float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", connect_timeout))
+        self.read_timeout = float(os.getenv(f"{prefix}_READ_TIMEOUT", read_timeout))
+        self.retries = int(os.getenv(f"{prefix}_RETRIES", retries))
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.read_timeout,
+            pool=self.connect_timeout,
+        )
+
+# Scans clone and analyse a whole repository, so they get long read timeouts;
+# health probes must answer quickly. Each value can be overridden with
+# BACKEND_<ENDPOINT>_CONNECT_TIMEOUT, _READ_TIMEOUT and _RETRIES.
+ENDPOINT_POLICIES = {
+    policy.name: policy
+    for policy in (
+        EndpointPolicy("scan", connect_timeout=5.0, read_timeout=900.0, retries=0),
+        EndpointPolicy("scan_and_fix", connect_timeout=5.0, read_timeout=120.0, retries=0),
+        EndpointPolicy("job", connect_timeout=5.0, read_timeout=30.0, retries=2),
+        EndpointPolicy("jobs", connect_timeout=5.0, read_timeout=30.0, retries=2),
+        EndpointPolicy("health", connect_timeout=2.0, read_timeout=5.0, retries=1),
+        EndpointPolicy("status", connect_timeout=2.0, read_timeout=5.0, retries=1),
+        EndpointPolicy("github", connect_timeout=5.0, read_timeout=10.0, retries=1),
+    )
+}
+
+class CircuitBreaker:
+    """
+    Fails calls fast while an endpoint keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds. It then lets up to
+    `half_open_max_calls` probe calls through: one success closes it again,
+    one failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+    def before_call(self):
+        """Raises CircuitOpenError if the call must not be made."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit for {self.name} is open; backend is failing.")
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit for {self.name} is half-open; probing backend")
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                raise CircuitOpenError(f"Circuit for {self.name} is half-open; waiting for probe result.")
+            self._probes += 1
+
+    def release(self):
+        """Frees the probe slot of a call that ended without a result (e.g. cancelled)."""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probes = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probes = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+        }
+
+# One breaker per (endpoint, backend origin), created on first use
+breakers = {}
+
+def breaker_for(endpoint: str, url: str) -> CircuitBreaker:
+    origin = httpx.URL(url).copy_with(path="/", query=None, fragment=None)
+    key = f"{endpoint}@{str(origin).rstrip('/')}"
+    breaker = breakers.get(key)
+    if breaker is None:
+        breaker = breakers[key] = CircuitBreaker(key)
+    return breaker
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+async def send_request(endpoint: str, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+    """
+    Sends a backend request with the endpoint's timeouts, retries and circuit breaker.
+
+    Each endpoint has a separate breaker per backend origin, so one failing
+    backend does not stop calls to the others.
+
+    GET, HEAD and DELETE are retried with jittered backoff on transport errors
+    and on 502, 503 and 504. Other methods are sent once. Any response is
+    returned to the caller, including 4xx and 5xx ones.
+
+    With stream=True a 200 response is returned as soon as its headers arrive,
+    with the body unread; the caller must read or close it. Any other response
+    is read in full.
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit is open.
+        BackendTimeoutError: If the last attempt timed out.
+        BackendError: If the last attempt failed with any other transport error.
+    """
+    policy = ENDPOINT_POLICIES[endpoint]
+    breaker = breaker_for(endpoint, url)
+    method = method.upper()
+    attempts = policy.retries + 1 if method in IDEMPOTENT_METHODS else 1
+
+    for attempt in range(attempts):
+        breaker.before_call()
+        trace = metrics.backend_trace()
+        extensions = {"trace": trace.callback} if trace is not None else None
+        metrics.backend_in_flight.inc(endpoint)
+        started = time.perf_counter()
+        response = None
+        try:
+            if stream:
+                client = get_client()
+                request = client.build_request(method, url, timeout=policy.timeout, extensions=extensions, **kwargs)
+                response = await client.send(request, stream=True)
+                if response.status_code != 200:
+                    await response.aread()
+            else:
+                response = await get_client().request(method, url, timeout=policy.timeout, extensions=extensions, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            if response is not None:
+                await response.aclose()
+            raise
+        except httpx.TransportError as e:
+            metrics.observe_backend_failure(endpoint, e, time.perf_counter() - started)
+            add_phase(f"backend.{endpoint}", time.perf_counter() - started)
+            add_backend_call()
+            breaker.record_failure()
+            if attempt + 1 < attempts:
+                logger.warning(f"Retrying {method} {url} after {type(e).__name__} (attempt {attempt + 1} of {attempts})")
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
+            if isinstance(e, httpx.TimeoutException):
+                raise BackendTimeoutError(f"{method} {url} timed out: {type(e).__name__}") from e
+            raise BackendError(f"{method} {url} failed: {str(e) or type(e).__name__}") from e
+        except httpx.HTTPError as e:
+            # e.g. a DecodingError while reading a non-200 body
+            if response is not None:
+                await response.aclose()
+            metrics.observe_backend_failure(endpoint, e, time.perf_counter() - started)
+            add_phase(f"backend.{endpoint}", time.perf_counter() - started)
+            add_backend_call()
+            breaker.record_failure()
+            raise BackendError(f"{method} {url} failed: {str(e) or type(e).__name__}") from e
+        except Exception:
+            if response is not None:
+                await response.aclose()
+            breaker.release()
+            raise
+        finally:
+            metrics.backend_in_flight.dec(endpoint)
+
+        elapsed = time.perf_counter() - started
+        metrics.observe_backend(endpoint, response, elapsed, trace)
+        add_phase(f"backend.{endpoint}", elapsed)
+        add_backend_call()
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if response.status_code in RETRY_STATUS_CODES and attempt + 1 < attempts:
+            logger.warning(f"Retrying {method} {url} after status {response.status_code} (attempt {attempt + 1} of {attempts})")
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        return response
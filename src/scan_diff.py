@@ -0,0 +1,92 @@
+"""Differences between consecutive scans of the same repository"""
+from collections import OrderedDict
+
+# A vulnerability is the same finding across scans when these fields match
+FINGERPRINT_FIELDS = ("package_name", "cve", "file_path", "current_version")
+
+def fingerprint(vulnerability: dict) -> tuple:
+    return tuple(vulnerability.get(field) for field in FINGERPRINT_FIELDS)
+
+class ScanBaselineStore:
+    """
+    Keeps the fingerprint set of the last diffed scan of each repository.
+
+    Only the fingerprint fields are kept, not the full vulnerabilities, so a
+    baseline costs a few hundred bytes per finding. At most `max_entries`
+    repositories are remembered; the least recently diffed is dropped first.
+    diff is async so SharedScanBaselineStore can be used in its place.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._baselines = OrderedDict()  # key -> (scan_time, frozenset of fingerprints)
+
+    async def diff(self, key, scan_time: str, vulnerabilities: list[dict]) -> dict:
+        """
+        Compares a scan with the stored baseline and makes the scan the new baseline.
+
+        Returns:
+            dict: {
+                "baseline_scan_time": str | None,   # None on the first diff of this key
+                "added": [dict, ...],               # full vulnerabilities not in the baseline
+                "removed": [dict, ...],             # fingerprint fields of findings now gone
+                "unchanged_count": int
+            }
+        """
+        current = _by_fingerprint(vulnerabilities)
+        previous = self._baselines.pop(key, None)
+        if self.max_entries > 0:
+            self._baselines[key] = (scan_time, frozenset(current))
+            while len(self._baselines) > self.max_entries:
+                self._baselines.popitem(last=False)
+        return _compare(previous, current)
+
+    def __len__(self) -> int:
+        return len(self._baselines)
+
+class SharedScanBaselineStore:
+    """
+    ScanBaselineStore kept in the shared store, so every worker diffs against the same baseline.
+
+    When two workers diff the same repository at once, the baseline written
+    last wins.
+    """
+
+    NAMESPACE = "baseline"
+
+    def __init__(self, store, ttl_seconds: float = 30 * 24 * 3600):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    async def diff(self, key, scan_time: str, vulnerabilities: list[dict]) -> dict:
+        """Same as ScanBaselineStore.diff."""
+        current = _by_fingerprint(vulnerabilities)
+        stored = await self.store.get(self.NAMESPACE, key)
+        await self.store.put(self.NAMESPACE, key, [scan_time, list(current)], self.ttl_seconds)
+        previous = None
+        if stored is not None:
+            previous = (stored[0], frozenset(tuple(item) for item in stored[1]))
+        return _compare(previous, current)
+
+def _by_fingerprint(vulnerabilities: list[dict]) -> dict:
+    current = {}
+    for vulnerability in vulnerabilities:
+        current.setdefault(fingerprint(vulnerability), vulnerability)
+    return current
+
+def _compare(previous: tuple | None, current: dict) -> dict:
+    """Diffs fingerprint -> vulnerability against a (scan_time, fingerprint set) baseline."""
+    if previous is None:
+        return {
+            "baseline_scan_time": None,
+            "added": list(current.values()),
+            "removed": [],
+            "unchanged_count": 0
+        }
+    baseline_scan_time, baseline = previous
+    return {
+        "baseline_scan_time": baseline_scan_time,
+        "added": [vulnerability for key, vulnerability in current.items() if key not in baseline],
+        "removed": [dict(zip(FINGERPRINT_FIELDS, key)) for key in sorted(baseline - current.keys(), key=str)],
+        "unchanged_count": len(baseline & current.keys())
+    }
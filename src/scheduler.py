@@ -0,0 +1,274 @@
+"""Admission control and priority scheduling of outbound backend calls"""
+import asyncio
+import itertools
+import os
+import time
+
+from collections import Counter
+from contextlib import asynccontextmanager
+from fastmcp.server.dependencies import get_access_token, get_context, get_http_request
+from config.logging_config import setup_logging
+from src.resilience import BackendError
+from src.shared_state import SHARED_POLL_INTERVAL, shared_state
+from src.slow_calls import add_phase
+from src.supervisor import WORKERS, is_worker
+
+# Setup logging
+logger = setup_logging()
+
+BACKEND_MAX_CONCURRENCY = int(os.getenv("BACKEND_MAX_CONCURRENCY", 64))
+INTERACTIVE_MAX_CONCURRENCY = int(os.getenv("INTERACTIVE_MAX_CONCURRENCY", 48))
+SCAN_MAX_CONCURRENCY = int(os.getenv("SCAN_MAX_CONCURRENCY", 16))
+SCAN_MAX_PER_CLIENT = int(os.getenv("SCAN_MAX_PER_CLIENT", 4))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", 256))
+SCHEDULER_MAX_WAIT = float(os.getenv("SCHEDULER_MAX_WAIT", 60.0))
+# Request header naming the calling client, e.g. set by a gateway; takes precedence over other identities
+CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "x-client-id").lower()
+
+INTERACTIVE = "interactive"
+SCAN = "scan"
+
+# Lower number runs first
+PRIORITIES = {
+    INTERACTIVE: 0,
+    SCAN: 1,
+}
+
+ENDPOINT_CLASSES = {
+    "scan": SCAN,
+    "scan_and_fix": SCAN,
+    "job": INTERACTIVE,
+    "jobs": INTERACTIVE,
+    "health": INTERACTIVE,
+    "status": INTERACTIVE,
+}
+
+class AdmissionRejectedError(BackendError):
+    """The outbound queue is full or the call waited too long for a slot."""
+
+    code = 429
+
+def current_client_id() -> str | None:
+    """
+    Identifies the client making the current tool call.
+
+    A CLIENT_ID_HEADER request header comes first, then the authenticated
+    client, then the MCP session. In worker mode sessions are stateless and
+    new on every request, so without a header or token the client is unknown
+    and None is returned; the peer address is no help there, since behind a
+    proxy every caller shares it.
+    """
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        request = None
+    if request is not None and request.headers.get(CLIENT_ID_HEADER):
+        return f"header:{request.headers[CLIENT_ID_HEADER]}"
+    token = get_access_token()
+    if token is not None and token.client_id:
+        return f"auth:{token.client_id}"
+    if is_worker():
+        return None
+    try:
+        return get_context().session_id or "anonymous"
+    except RuntimeError:
+        # No tool call in progress, e.g. a background probe.
+        return "internal"
+
+def _per_worker(limit: int) -> int:
+    """Returns this process's share of a limit meant for the whole host."""
+    return max(1, -(-limit // WORKERS)) if is_worker() else limit
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "cls", "client", "future", "timer")
+
+    def __init__(self, priority: int, seq: int, cls: str, client: str | None, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.cls = cls
+        self.client = client
+        self.future = future
+        self.timer = None  # rejects the waiter once its wait budget has run out
+
+class OutboundScheduler:
+    """
+    Decides when each outbound backend call may start.
+
+    Calls are split into classes with their own concurrency budget inside a
+    shared total. Status, health and list calls ("interactive") are granted
+    before scans whenever both are waiting. A single MCP session may hold at
+    most SCAN_MAX_PER_CLIENT scan slots, and among waiting scans the session
+    with the fewest in flight goes first, so one client cannot take every slot.
+    Calls from an unidentified client (None) are only bound by the class and
+    total limits.
+
+    In worker mode the concurrency limits are split evenly between the
+    workers, and a client's scan slots are also counted across workers
+    through shared leases, so the host as a whole keeps the configured limits.
+
+    At most SCHEDULER_MAX_QUEUE calls wait for a slot. Calls beyond that, or
+    calls that wait longer than SCHEDULER_MAX_WAIT seconds, are rejected with
+    AdmissionRejectedError (code 429). Time a scan spends waiting only because
+    its own session already holds SCAN_MAX_PER_CLIENT slots does not count
+    towards the wait, so a bulk scan in one session queues behind its own
+    scans instead of being rejected.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = _per_worker(BACKEND_MAX_CONCURRENCY),
+        budgets: dict | None = None,
+        max_per_client: int = SCAN_MAX_PER_CLIENT,
+        max_queue: int = SCHEDULER_MAX_QUEUE,
+        max_wait: float = SCHEDULER_MAX_WAIT,
+        shared=None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.budgets = budgets or {
+            INTERACTIVE: _per_worker(INTERACTIVE_MAX_CONCURRENCY),
+            SCAN: _per_worker(SCAN_MAX_CONCURRENCY),
+        }
+        self.shared = shared
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.rejected = 0
+        self._total = 0
+        self._in_flight = Counter()
+        self._client_scans = Counter()
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _at_client_cap(self, cls: str, client: str | None) -> bool:
+        return cls == SCAN and client is not None and self._client_scans[client] >= self.max_per_client
+
+    def _can_run(self, cls: str, client: str | None) -> bool:
+        if self._total >= self.max_concurrency or self._in_flight[cls] >= self.budgets[cls]:
+            return False
+        return not self._at_client_cap(cls, client)
+
+    def _grant(self, cls: str, client: str | None):
+        self._total += 1
+        self._in_flight[cls] += 1
+        if cls == SCAN and client is not None:
+            self._client_scans[client] += 1
+
+    def _dispatch(self):
+        if not self._waiting:
+            return
+        self._waiting.sort(key=lambda w: (w.priority, self._client_scans[w.client] if w.cls == SCAN else 0, w.seq))
+        remaining = []
+        for waiter in self._waiting:
+            if waiter.future.done():
+                continue
+            if self._can_run(waiter.cls, waiter.client):
+                self._grant(waiter.cls, waiter.client)
+                if waiter.timer is not None:
+                    waiter.timer.cancel()
+                waiter.future.set_result(None)
+                continue
+            remaining.append(waiter)
+            if waiter.timer is None and not self._at_client_cap(waiter.cls, waiter.client):
+                # The wait budget starts once other callers are what hold the call back.
+                waiter.timer = asyncio.get_running_loop().call_later(self.max_wait, self._expire, waiter)
+        self._waiting = remaining
+
+    def _expire(self, waiter: _Waiter):
+        if waiter.future.done():
+            return
+        self._waiting = [w for w in self._waiting if w is not waiter]
+        self.rejected += 1
+        logger.warning(f"Rejected {waiter.cls} call for client {waiter.client}: no backend slot within {self.max_wait}s")
+        waiter.future.set_exception(
+            AdmissionRejectedError(f"Waited more than {self.max_wait} seconds for a backend slot; retry later.")
+        )
+
+    async def acquire(self, cls: str, client: str | None):
+        if not self._waiting and self._can_run(cls, client):
+            self._grant(cls, client)
+            return
+        if len(self._waiting) >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"Rejected {cls} call for client {client}: {len(self._waiting)} calls already queued")
+            raise AdmissionRejectedError("Too many backend calls are queued; retry later.")
+        waiter = _Waiter(PRIORITIES[cls], next(self._seq), cls, client, asyncio.get_running_loop().create_future())
+        self._waiting.append(waiter)
+        self._dispatch()
+        try:
+            await asyncio.shield(waiter.future)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: _Waiter):
+        """Drops a waiter that gave up, returning its slot if one was granted meanwhile."""
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+        if not waiter.future.done():
+            waiter.future.cancel()
+            self._waiting = [w for w in self._waiting if w is not waiter]
+        elif not waiter.future.cancelled() and waiter.future.exception() is None:
+            self.release(waiter.cls, waiter.client)
+
+    def release(self, cls: str, client: str | None):
+        self._total -= 1
+        self._in_flight[cls] -= 1
+        if cls == SCAN and client is not None:
+            self._client_scans[client] -= 1
+            if self._client_scans[client] <= 0:
+                del self._client_scans[client]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str):
+        """Holds a slot for the endpoint's class for the duration of the block."""
+        cls = ENDPOINT_CLASSES.get(endpoint, INTERACTIVE)
+        client = current_client_id()
+        started = time.monotonic()
+        lease = None
+        if cls == SCAN and client is not None and self.shared is not None:
+            lease = await self._acquire_client_lease(client)
+        try:
+            await self.acquire(cls, client)
+        except BaseException:
+            await self._release_client_lease(lease)
+            raise
+        waited = time.monotonic() - started
+        add_phase("scheduler_wait", waited)
+        if waited > 1.0:
+            logger.info(f"{endpoint} call for client {client} waited {waited:.2f}s for a backend slot")
+        try:
+            yield
+        finally:
+            self.release(cls, client)
+            await self._release_client_lease(lease)
+
+    async def _acquire_client_lease(self, client: str) -> tuple:
+        """
+        Takes one of the client's scan slots shared by all workers, waiting for one to free up.
+
+        Like the per-client cap within a worker, this wait does not count towards max_wait.
+        """
+        while True:
+            for index in range(self.max_per_client):
+                name = f"client_scan:{client}:{index}"
+                acquired, token = await self.shared.acquire(name)
+                if acquired:
+                    return name, token, asyncio.create_task(self.shared.hold(name, token))
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+
+    async def _release_client_lease(self, lease: tuple | None):
+        if lease is None:
+            return
+        name, token, renewer = lease
+        renewer.cancel()
+        await asyncio.shield(self.shared.release(name, token))
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": dict(self._in_flight),
+            "queued": len(self._waiting),
+            "rejected": self.rejected,
+        }
+
+outbound_scheduler = OutboundScheduler(shared=shared_state)
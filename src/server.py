@@ -1,9 +1,20 @@
 import asyncio
+import hmac
 import os
+import signal
+import sys
+import uvicorn
 
 from fastmcp import FastMCP
-from config.logging_config import setup_logging
-from src.tools import initialize_tool
+from sse_starlette.sse import AppStatus
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from config.logging_config import setup_logging, shutdown_logging
+from src.tools import initialize_tool, shutdown_tool
+from src.job_events import job_events, JOB_CALLBACK_PATH, JOB_CALLBACK_SECRET
+from src.metrics import metrics
+from src.shared_state import shared_state
+from src.supervisor import WORKERS, WORKER_SHUTDOWN_TIMEOUT, is_worker, notify_ready, run_supervisor, worker_name, worker_socket
 
 # Setup logging
 logger = setup_logging()
@@ -11,13 +22,96 @@ logger = setup_logging()
 # Initialize the MCP server
 mcp = FastMCP("Depemdency Scanner MCP Service")
 
+@mcp.custom_route(JOB_CALLBACK_PATH, methods=["POST"])
+async def job_callback(request: Request) -> JSONResponse:
+    """
+    Receives job state changes from the scanner backend.
+
+    Expects a JSON body with the job "id" (or "job_id"). Waiters for that job
+    re-fetch its status from the backend, so the body itself is never trusted
+    as the job result.
+    """
+    if JOB_CALLBACK_SECRET:
+        token = request.headers.get("X-Callback-Token", "")
+        if not hmac.compare_digest(token, JOB_CALLBACK_SECRET):
+            logger.warning("Rejected job callback with an invalid token")
+            return JSONResponse({"status": "error", "code": 401, "message": "Invalid callback token"}, status_code=401)
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {}
+    job_id = body.get("id") or body.get("job_id")
+    if not job_id:
+        return JSONResponse({"status": "error", "code": 422, "message": "Missing job id"}, status_code=422)
+    logger.info(f"Received job callback for job_id: {job_id} with status: {body.get('status')}")
+    await job_events.publish(str(job_id))
+    return JSONResponse({"status": "accepted"}, status_code=202)
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """
+    Serves tool, backend and event loop metrics in the Prometheus text format.
+
+    In worker mode any worker answers with the series of every worker, each
+    labelled worker="<index>/<pid>"; other workers' values are at most
+    METRICS_SHARE_INTERVAL seconds old. Sum over the label for host totals.
+    """
+    if is_worker() and shared_state is not None:
+        text = await metrics.render_workers(shared_state, worker_name())
+    else:
+        text = metrics.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def run_server():
+    try:
+        if is_worker():
+            await run_worker()
+        else:
+            await mcp.run_async(
+                transport="streamable-http", 
+                host="0.0.0.0", 
+                port=os.getenv("PORT", 8080),
+            )
+    finally:
+        await shutdown_tool()
+        shutdown_logging()
+
+async def run_worker():
+    """
+    Serves on the listening socket inherited from the supervisor.
+
+    Sessions are stateless, since consecutive requests of one client can
+    reach different workers. The worker publishes its metrics to the shared
+    store so that /metrics on any worker covers them all.
+    """
+    app = mcp.http_app(transport="streamable-http", stateless_http=True)
+    # log_config=None keeps uvicorn from replacing the logging setup, which would close our handlers.
+    config = uvicorn.Config(app, lifespan="on", log_config=None, timeout_graceful_shutdown=WORKER_SHUTDOWN_TIMEOUT)
+    server = uvicorn.Server(config)
+    # sse_starlette ends open SSE streams as soon as shutdown starts, which
+    # cuts off tool calls in progress; let them finish within the graceful timeout.
+    AppStatus.disable_automatic_graceful_drain()
+    # uvicorn re-raises the stop signal once it has shut down gracefully; with
+    # these handlers in place that returns here, so run_server's cleanup runs.
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, server.handle_exit)
+    serving = asyncio.create_task(server.serve(sockets=[worker_socket()]))
+    while not server.started and not serving.done():
+        await asyncio.sleep(0.05)
+    if server.started:
+        notify_ready()
+    sharing = asyncio.create_task(metrics.share_forever(shared_state, worker_name())) if shared_state is not None else None
+    try:
+        await serving
+    finally:
+        if sharing is not None:
+            sharing.cancel()
+
 if __name__ == "__main__":
+    if WORKERS > 1 and not is_worker():
+        sys.exit(run_supervisor(WORKERS, "0.0.0.0", int(os.getenv("PORT", 8080))))
     initialize_tool(mcp)
     logger.info(f" MCP server started on port {os.getenv('PORT', 8080)}")
-    asyncio.run(
-        mcp.run_async(
-            transport="streamable-http", 
-            host="0.0.0.0", 
-            port=os.getenv("PORT", 8080),
-        )
-    )
\ No newline at end of file
+    asyncio.run(run_server())
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""SQLite store for state shared by the worker processes on one host"""
+import asyncio
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from config.logging_config import setup_logging
+from src.json_codec import dumps, loads
+
+# Setup logging
+logger = setup_logging()
+
+# Shared state is off when unset; the multi-worker supervisor sets it for its workers
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+# A lease not renewed for this long is taken to belong to a dead worker
+SHARED_LEASE_TTL = float(os.getenv("SHARED_LEASE_TTL", 30.0))
+# How often workers waiting on another worker check the store
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", 0.25))
+# Published events are kept this long for workers that poll late
+SHARED_EVENT_RETENTION = 600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_used_at ON entries (namespace, used_at);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def key_of(key) -> str:
+    """Encodes a str or tuple key as the text stored in the database."""
+    return key if isinstance(key, str) else dumps(list(key)).decode()
+
+class SharedStore:
+    """
+    Key-value entries, leases and events in one SQLite file, shared by processes.
+
+    Entries are JSON-encoded values grouped in namespaces, each with a TTL and
+    an optional byte budget enforced by evicting the least recently used
+    entries of the namespace. Leases give one process at a time the right to
+    do a piece of work. Events are an append-only log that processes poll.
+    Times are wall-clock, since processes do not share a monotonic clock.
+    Every call runs in a worker thread, like the job index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        """Opens the database on first use; callers must hold the lock."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def get(self, namespace: str, key):
+        """Returns the stored value, or None if it is missing or expired."""
+        return await asyncio.to_thread(self._get, namespace, key_of(key))
+
+    def _get(self, namespace: str, key: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?", (namespace, key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET used_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return loads(row[0])
+
+    async def items(self, namespace: str) -> dict:
+        """Returns every live entry of a namespace, keyed by the stored key text."""
+        return await asyncio.to_thread(self._items, namespace)
+
+    def _items(self, namespace: str) -> dict:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT key, value FROM entries WHERE namespace = ? AND expires_at > ?", (namespace, time.time())
+            ).fetchall()
+        return {key: loads(value) for key, value in rows}
+
+    async def put(self, namespace: str, key, value, ttl_seconds: float, max_bytes: int = 0) -> bool:
+        """
+        Stores a value, evicting the namespace's least recently used entries beyond `max_bytes`.
+
+        Returns False if the value alone is larger than `max_bytes`.
+        """
+        return await self.put_many(namespace, [(key, value)], ttl_seconds, max_bytes)
+
+    async def put_many(self, namespace: str, items: list[tuple], ttl_seconds: float, max_bytes: int = 0) -> bool:
+        """Stores several (key, value) pairs in one transaction; all or none of them."""
+        return await asyncio.to_thread(self._put_many, namespace, items, ttl_seconds, max_bytes)
+
+    def _put_many(self, namespace: str, items: list[tuple], ttl_seconds: float, max_bytes: int) -> bool:
+        rows = [(key_of(key), dumps(value)) for key, value in items]
+        if max_bytes and sum(len(data) for _, data in rows) > max_bytes:
+            return False
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM entries WHERE namespace = ? AND expires_at <= ?", (namespace, now))
+                db.executemany(
+                    "INSERT OR REPLACE INTO entries (namespace, key, expires_at, used_at, size, value) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(namespace, key, now + ttl_seconds, now, len(data), data) for key, data in rows],
+                )
+                if max_bytes:
+                    self._evict(db, namespace, max_bytes)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return True
+
+    @staticmethod
+    def _evict(db: sqlite3.Connection, namespace: str, max_bytes: int):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+        if total <= max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM entries WHERE namespace = ? ORDER BY used_at", (namespace,)):
+            victims.append((namespace, key))
+            total -= size
+            if total <= max_bytes:
+                break
+        db.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+
+    async def delete(self, namespace: str, key):
+        await asyncio.to_thread(self._delete, namespace, key_of(key))
+
+    def _delete(self, namespace: str, key: str):
+        with self._lock:
+            self._db().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    async def acquire(self, name: str, ttl_seconds: float = SHARED_LEASE_TTL) -> tuple[bool, str]:
+        """
+        Takes the lease `name` unless another holder's lease is still valid.
+
+        Returns (acquired, token of the current holder).
+        """
+        return await asyncio.to_thread(self._acquire, name, ttl_seconds)
+
+    def _acquire(self, name: str, ttl_seconds: float) -> tuple[bool, str]:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row is not None and row[1] > now:
+                    db.execute("COMMIT")
+                    return False, row[0]
+                token = secrets.token_hex(8)
+                db.execute(
+                    "INSERT OR REPLACE INTO leases (name, token, expires_at) VALUES (?, ?, ?)",
+                    (name, token, now + ttl_seconds),
+                )
+                db.execute("COMMIT")
+                return True, token
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    async def renew(self, name: str, token: str, ttl_seconds: float = SHARED_LEASE_TTL) -> bool:
+        return await asyncio.to_thread(self._renew, name, token, ttl_seconds)
+
+    def _renew(self, name: str, token: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            cursor = self._db().execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND token = ?", (time.time() + ttl_seconds, name, token)
+            )
+        return cursor.rowcount > 0
+
+    async def release(self, name: str, token: str):
+        await asyncio.to_thread(self._release, name, token)
+
+    def _release(self, name: str, token: str):
+        with self._lock:
+            self._db().execute("DELETE FROM leases WHERE name = ? AND token = ?", (name, token))
+
+    async def hold(self, name: str, token: str, ttl_seconds: float = SHARED_LEASE_TTL):
+        """Renews a lease until cancelled; run it as a task while the lease is in use."""
+        while True:
+            await asyncio.sleep(ttl_seconds / 3)
+            if not await self.renew(name, token, ttl_seconds):
+                logger.warning(f"Lost shared lease {name}")
+                return
+
+    async def holder(self, name: str) -> str | None:
+        """Returns the token of the valid lease `name`, if any."""
+        return await asyncio.to_thread(self._holder, name)
+
+    def _holder(self, name: str) -> str | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT token FROM leases WHERE name = ? AND expires_at > ?", (name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    async def publish(self, topic: str):
+        await asyncio.to_thread(self._publish, topic)
+
+    def _publish(self, topic: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT INTO events (topic, created_at) VALUES (?, ?)", (topic, now))
+            db.execute("DELETE FROM events WHERE created_at < ?", (now - SHARED_EVENT_RETENTION,))
+
+    async def events_after(self, seq: int) -> list[tuple[int, str]]:
+        """Returns (seq, topic) of the events published after `seq`, oldest first."""
+        return await asyncio.to_thread(self._events_after, seq)
+
+    def _events_after(self, seq: int) -> list[tuple[int, str]]:
+        with self._lock:
+            return self._db().execute("SELECT seq, topic FROM events WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+
+    async def last_event(self) -> int:
+        return await asyncio.to_thread(self._last_event)
+
+    def _last_event(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    async def stats(self, namespace: str) -> dict:
+        return await asyncio.to_thread(self._stats, namespace)
+
+    def _stats(self, namespace: str) -> dict:
+        with self._lock:
+            entries, size = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ? AND expires_at > ?",
+                (namespace, time.time()),
+            ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class SharedFlight:
+    """
+    Runs a call for a key in one process at a time, sharing its result with the others.
+
+    The process that takes the key's lease runs the call and stores the result
+    under the lease token; processes that find the lease taken poll for that
+    result instead of repeating the call. If the holder fails without a result,
+    or dies and its lease expires, a waiting process takes over. Use it as the
+    `shared` delegate of a SingleFlight so each process polls once per key.
+    """
+
+    def __init__(self, store: SharedStore, namespace: str, result_ttl: float = 60.0):
+        self.store = store
+        self.namespace = namespace
+        self.result_ttl = result_ttl
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        name = f"{self.namespace}:{key_of(key)}"
+        while True:
+            acquired, token = await self.store.acquire(name)
+            if acquired:
+                return await self._run(name, token, fn, *args, **kwargs)
+            result = await self._wait(name, token)
+            if result is not None:
+                self.joined += 1
+                return result
+
+    async def _run(self, name: str, token: str, fn, *args, **kwargs):
+        self.started += 1
+        renewer = asyncio.create_task(self.store.hold(name, token))
+        try:
+            result = await fn(*args, **kwargs)
+            # Stored before the lease is released, so waiters never miss it.
+            await self.store.put(self.namespace, f"{name}@{token}", result, self.result_ttl)
+            return result
+        finally:
+            renewer.cancel()
+            await self.store.release(name, token)
+
+    async def _wait(self, name: str, token: str):
+        """Polls for the result of the holder's call; returns None once the lease is gone without one."""
+        while True:
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            result = await self.store.get(self.namespace, f"{name}@{token}")
+            if result is not None:
+                return result
+            if await self.store.holder(name) != token:
+                return await self.store.get(self.namespace, f"{name}@{token}")
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "joined": self.joined,
+        }
+
+shared_state = SharedStore(SHARED_STATE_PATH) if SHARED_STATE_PATH else None
@@ -0,0 +1,54 @@
+"""In-flight deduplication of identical concurrent calls"""
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same task and receive the same result or exception.
+    A caller that is cancelled does not cancel the shared task.
+
+    With a `shared` delegate such as SharedFlight, the call itself is made
+    through the delegate so it is also deduplicated across processes.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._calls.get(key)
+        if task is None:
+            if self.shared is not None:
+                task = asyncio.ensure_future(self.shared.do(key, fn, *args, **kwargs))
+            else:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away.
+            task.exception()
+
+    def stats(self) -> dict:
+        stats = {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
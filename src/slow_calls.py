@@ -0,0 +1,196 @@
+"""Capture of slow tool calls with per-phase timings and optional stack samples"""
+import contextvars
+import os
+import sys
+import threading
+import time
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config.logging_config import setup_logging
+from src.cache import json_size
+
+# Setup logging
+logger = setup_logging()
+
+# Tool calls slower than this are recorded; 0 disables capture
+SLOW_CALL_THRESHOLD_MS = float(os.getenv("SLOW_CALL_THRESHOLD_MS", 2000))
+SLOW_CALL_BUFFER_SIZE = int(os.getenv("SLOW_CALL_BUFFER_SIZE", 100))
+# Sample the event loop thread's stack while calls run and summarize it for slow ones
+SLOW_CALL_PROFILE = os.getenv("SLOW_CALL_PROFILE", "false").lower() in ("1", "true", "yes")
+SLOW_CALL_PROFILE_INTERVAL = float(os.getenv("SLOW_CALL_PROFILE_INTERVAL", 0.01))
+SLOW_CALL_PROFILE_TOP = int(os.getenv("SLOW_CALL_PROFILE_TOP", 10))
+
+_current_call = contextvars.ContextVar("slow_call", default=None)
+
+class CallTiming:
+    """Timings gathered while one tool call runs."""
+
+    __slots__ = ("tool", "started_at", "started", "phases", "backend_calls", "backend_bytes")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.phases = Counter()
+        self.backend_calls = 0
+        self.backend_bytes = 0
+
+def add_phase(name: str, seconds: float):
+    """Adds time spent in a phase to the tool call running in this context, if any."""
+    call = _current_call.get()
+    if call is not None:
+        call.phases[name] += seconds
+
+def add_backend_call():
+    call = _current_call.get()
+    if call is not None:
+        call.backend_calls += 1
+
+def add_backend_bytes(size: int):
+    call = _current_call.get()
+    if call is not None:
+        call.backend_bytes += size
+
+@contextmanager
+def phase(name: str):
+    """Times the enclosed block as a phase of the current tool call."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, time.perf_counter() - started)
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval from a daemon thread.
+
+    Samples are kept for the last `window` seconds, so the summary for a slow
+    call covers everything the event loop ran meanwhile, not only that call.
+    """
+
+    def __init__(self, thread_id: int, interval: float, window: float = 120.0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self._samples = deque(maxlen=max(1, int(window / interval)))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="slow-call-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < 8:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._samples.append((time.perf_counter(), " <- ".join(stack)))
+
+    def summary(self, since: float, until: float, top: int) -> list[dict]:
+        counts = Counter(stack for at, stack in list(self._samples) if since <= at <= until)
+        return [{"stack": stack, "samples": count} for stack, count in counts.most_common(top)]
+
+    def stop(self):
+        self._stop.set()
+
+class SlowCallRecorder:
+    """
+    Keeps the most recent slow tool calls in a bounded ring buffer.
+
+    Each record has the call's duration and the time spent in each phase:
+    scheduler_wait, backend.<endpoint>, json_decode and cache_store. Backend
+    phases are summed over every request the call made, including concurrent
+    ones, so they can add up to more than the call's duration.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_CALL_THRESHOLD_MS,
+        capacity: int = SLOW_CALL_BUFFER_SIZE,
+        profile: bool = SLOW_CALL_PROFILE,
+    ):
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self.profile = profile
+        self.recorded = 0
+        self._records = deque(maxlen=max(1, capacity))
+        self._sampler = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    @contextmanager
+    def track(self, tool: str, arguments: dict):
+        """Times a tool call; the block must set `.result` on the yielded holder when it returns."""
+        if not self.enabled:
+            yield _Outcome()
+            return
+        if self.profile and self._sampler is None:
+            self._sampler = StackSampler(threading.get_ident(), SLOW_CALL_PROFILE_INTERVAL)
+        call = CallTiming(tool)
+        outcome = _Outcome()
+        token = _current_call.set(call)
+        try:
+            yield outcome
+        except Exception as e:
+            outcome.error = type(e).__name__
+            raise
+        finally:
+            _current_call.reset(token)
+            ended = time.perf_counter()
+            duration_ms = (ended - call.started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self._record(call, ended, duration_ms, arguments, outcome)
+
+    def _record(self, call: CallTiming, ended: float, duration_ms: float, arguments: dict, outcome: "_Outcome"):
+        result = outcome.result
+        error = outcome.error
+        if error is None and isinstance(result, dict) and result.get("status") == "error":
+            error = str(result.get("code"))
+        record = {
+            "tool": call.tool,
+            "started_at": call.started_at.isoformat(),
+            "duration_ms": round(duration_ms, 1),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in call.phases.most_common()},
+            "backend_calls": call.backend_calls,
+            "request_bytes": json_size({key: value for key, value in arguments.items() if key != "ctx"}),
+            "response_bytes": json_size(result) if result is not None else 0,
+            "backend_response_bytes": call.backend_bytes,
+            "error": error,
+        }
+        if self._sampler is not None:
+            record["profile"] = self._sampler.summary(call.started, ended, SLOW_CALL_PROFILE_TOP)
+        self._records.append(record)
+        self.recorded += 1
+        logger.warning(f"Slow tool call: {call.tool} took {record['duration_ms']}ms, phases: {record['phases_ms']}")
+
+    def dump(self, clear: bool = False) -> dict:
+        records = list(self._records)
+        if clear:
+            self._records.clear()
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "profiling": self._sampler is not None,
+            "calls": records,
+        }
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+class _Outcome:
+    __slots__ = ("result", "error")
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+
+slow_calls = SlowCallRecorder()
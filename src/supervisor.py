@@ -0,0 +1,190 @@
+"""Multi-process mode: a supervisor running server workers on one shared listening socket"""
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from config.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Number of server processes; 1 serves from the main process without a supervisor
+WORKERS = int(os.getenv("WORKERS", 1))
+# How long a new worker may take to start serving before a restart is abandoned
+WORKER_START_TIMEOUT = float(os.getenv("WORKER_START_TIMEOUT", 60))
+# How long a stopped worker may spend finishing its requests before it is killed
+WORKER_SHUTDOWN_TIMEOUT = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", 60))
+# Shared state file for the workers when SHARED_STATE_PATH is not set
+DEFAULT_SHARED_STATE_PATH = "shared_state.sqlite3"
+
+_LISTEN_FD_ENV = "WORKER_LISTEN_FD"
+_READY_FD_ENV = "WORKER_READY_FD"
+
+def is_worker() -> bool:
+    return _LISTEN_FD_ENV in os.environ
+
+def worker_socket() -> socket.socket:
+    """Returns the listening socket inherited from the supervisor."""
+    return socket.socket(fileno=int(os.environ[_LISTEN_FD_ENV]))
+
+def worker_name() -> str:
+    """Names this worker process as "<index>/<pid>"; a replacement keeps the index but not the pid."""
+    return f"{os.environ.get('WORKER_ID', '0')}/{os.getpid()}"
+
+def notify_ready():
+    """Tells the supervisor that this worker is accepting connections."""
+    fd = os.environ.pop(_READY_FD_ENV, None)
+    if fd is not None:
+        os.write(int(fd), b"1")
+        os.close(int(fd))
+
+class Worker:
+    """One server process and the pipe it reports readiness on."""
+
+    def __init__(self, index: int, listener: socket.socket, command: list[str]):
+        self.index = index
+        read_fd, write_fd = os.pipe()
+        env = {
+            **os.environ,
+            _LISTEN_FD_ENV: str(listener.fileno()),
+            _READY_FD_ENV: str(write_fd),
+            "WORKER_ID": str(index),
+        }
+        try:
+            self.process = subprocess.Popen(command, env=env, pass_fds=(listener.fileno(), write_fd))
+        finally:
+            os.close(write_fd)
+        self._ready_fd = read_fd
+        self.stop_deadline = None
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Waits for the worker to start serving; False if it exits or times out first."""
+        try:
+            readable, _, _ = select.select([self._ready_fd], [], [], timeout)
+            return bool(readable) and os.read(self._ready_fd, 1) == b"1"
+        finally:
+            os.close(self._ready_fd)
+
+    def stop(self):
+        """Asks the worker to stop accepting connections and exit once its requests finish."""
+        if self.stop_deadline is None:
+            self.stop_deadline = time.monotonic() + WORKER_SHUTDOWN_TIMEOUT
+            self.process.send_signal(signal.SIGTERM)
+
+    def reap(self) -> bool:
+        """True once a stopped worker has exited; kills it when its deadline has passed."""
+        if self.process.poll() is not None:
+            return True
+        if self.stop_deadline is not None and time.monotonic() > self.stop_deadline:
+            logger.warning(f"Worker {self.index} (pid {self.pid}) did not stop in time; killing it")
+            self.process.kill()
+        return False
+
+class Supervisor:
+    """
+    Runs `workers` server processes that accept connections from one listening socket.
+
+    The supervisor binds the socket and every worker inherits it, so the
+    kernel hands each connection to whichever worker accepts first. Unlike
+    separate SO_REUSEPORT sockets, a worker that stops accepting leaves
+    queued connections to the others instead of dropping them, which makes
+    restarts lossless.
+
+    Workers that exit unexpectedly are replaced. SIGHUP restarts the workers
+    one at a time: each replacement must be serving before the worker it
+    replaces is stopped, and a stopped worker finishes its requests for up to
+    WORKER_SHUTDOWN_TIMEOUT seconds. SIGTERM and SIGINT stop every worker
+    the same way and then exit.
+    """
+
+    def __init__(self, workers: int, host: str, port: int, command: list[str]):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.command = command
+        self._running = []
+        self._draining = []
+        self._stopping = False
+        self._reload = False
+
+    def run(self) -> int:
+        listener = socket.create_server((self.host, self.port), backlog=2048)
+        listener.set_inheritable(True)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        logger.info(f"Supervisor (pid {os.getpid()}) starting {self.workers} workers on {self.host}:{self.port}")
+        try:
+            for index in range(self.workers):
+                self._running.append(self._start(index, listener))
+            while not self._stopping:
+                time.sleep(0.5)
+                if self._reload:
+                    self._reload = False
+                    self._rolling_restart(listener)
+                self._replace_exited(listener)
+                self._draining = [worker for worker in self._draining if not worker.reap()]
+        finally:
+            logger.info("Supervisor stopping workers")
+            for worker in self._running:
+                worker.stop()
+            self._draining.extend(self._running)
+            self._running = []
+            while self._draining:
+                self._draining = [worker for worker in self._draining if not worker.reap()]
+                time.sleep(0.1)
+            listener.close()
+        return 0
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+
+    def _start(self, index: int, listener: socket.socket) -> Worker:
+        worker = Worker(index, listener, self.command)
+        if worker.wait_ready(WORKER_START_TIMEOUT):
+            logger.info(f"Worker {index} (pid {worker.pid}) is serving")
+        else:
+            logger.error(f"Worker {index} (pid {worker.pid}) did not start serving within {WORKER_START_TIMEOUT}s")
+        return worker
+
+    def _replace_exited(self, listener: socket.socket):
+        for position, worker in enumerate(self._running):
+            if self._stopping or worker.process.poll() is None:
+                continue
+            logger.error(f"Worker {worker.index} (pid {worker.pid}) exited with code {worker.process.returncode}; restarting it")
+            # Avoids a tight restart loop when workers fail at startup.
+            time.sleep(1.0)
+            self._running[position] = self._start(worker.index, listener)
+
+    def _rolling_restart(self, listener: socket.socket):
+        logger.info("Rolling restart of the workers")
+        for position, old in enumerate(list(self._running)):
+            if self._stopping:
+                return
+            new = Worker(old.index, listener, self.command)
+            if not new.wait_ready(WORKER_START_TIMEOUT):
+                logger.error(f"Replacement for worker {old.index} did not start serving; abandoning the restart")
+                new.stop()
+                self._draining.append(new)
+                return
+            logger.info(f"Worker {old.index} replaced: pid {old.pid} -> {new.pid}")
+            self._running[position] = new
+            old.stop()
+            self._draining.append(old)
+        logger.info("Rolling restart finished")
+
+def run_supervisor(workers: int, host: str, port: int) -> int:
+    """Runs the server as `workers` processes with shared state; returns the exit code."""
+    os.environ.setdefault("SHARED_STATE_PATH", DEFAULT_SHARED_STATE_PATH)
+    return Supervisor(workers, host, port, [sys.executable, "-m", "src.server"]).run()
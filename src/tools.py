@@ -1,24 +1,200 @@
-import requests
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import time
+import httpx
 
-from datetime import datetime
+from datetime import datetime, timezone
+from fastmcp import Context
 from config.logging_config import setup_logging
+from src.http_client import open_client, close_client
+from src.resilience import BackendError, BackendTimeoutError, InvalidResponseError
+from src.backend_pool import backend_pool
+from src.metrics import instrument_tool, metrics
+from src.analytics import GROUP_BY_COLUMNS, SORT_METRICS, create_store
+from src.cache import TTLCache
+from src.cve_table import CveTable, compact_vulnerabilities
+from src.github import normalize_repo_url, resolve_head_commit
+from src.json_codec import decode_response, decode_response_stream
+from src.jobs import is_active_status, is_terminal_status
+from src.job_index import job_index
+from src.job_events import job_events, callbacks_enabled, callback_url, JOB_CALLBACK_SECRET
+from src.scan_diff import ScanBaselineStore, SharedScanBaselineStore
+from src.shared_state import SharedFlight, shared_state
+from src.singleflight import SingleFlight
+from src.slow_calls import phase, slow_calls
+from src.supervisor import is_worker, worker_name
+from src.probes import CachedProbe
+from src.rate_limit import RateLimiter
+from src.pagination import (
+    VULNERABILITY_FIELDS,
+    CursorError,
+    SharedViewStore,
+    ViewStore,
+    decode_cursor,
+    encode_cursor,
+    filter_vulnerabilities,
+    parse_severities,
+    project,
+)
 
 # Setup logging
 logger = setup_logging()
 
-API_BASE_URL = "http://localhost:8000"
+SCAN_CACHE_MAX_BYTES = int(os.getenv("SCAN_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+SCAN_CACHE_TTL_SECONDS = float(os.getenv("SCAN_CACHE_TTL_SECONDS", 900))
+
+# Scan results keyed on (repo, resolved HEAD commit, dry_run)
+scan_cache = TTLCache(max_bytes=SCAN_CACHE_MAX_BYTES, ttl_seconds=SCAN_CACHE_TTL_SECONDS)
+
+# With several workers, scan results are also kept in the shared store; scan_cache
+# then holds the ones this worker has used recently, already decoded.
+SHARED_SCAN_CACHE_MAX_BYTES = int(os.getenv("SHARED_SCAN_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+SCAN_VIEW_MAX_BYTES = int(os.getenv("SCAN_VIEW_MAX_BYTES", 32 * 1024 * 1024))
+SCAN_VIEW_TTL_SECONDS = float(os.getenv("SCAN_VIEW_TTL_SECONDS", 900))
+VULN_PAGE_MAX_SIZE = int(os.getenv("VULN_PAGE_MAX_SIZE", 500))
+
+# Filtered scan results that later pages are read from
+if shared_state is not None:
+    scan_views = SharedViewStore(shared_state, max_bytes=SCAN_VIEW_MAX_BYTES, ttl_seconds=SCAN_VIEW_TTL_SECONDS)
+else:
+    scan_views = ViewStore(max_bytes=SCAN_VIEW_MAX_BYTES, ttl_seconds=SCAN_VIEW_TTL_SECONDS)
+
+# Metadata of the CVEs seen in backend responses; results share its description strings
+cve_table = CveTable()
+
+ANALYTICS_MAX_TOP_K = int(os.getenv("ANALYTICS_MAX_TOP_K", 1000))
+
+# Findings of the latest scan of each repository; None without numpy
+findings_store = create_store()
+
+SCAN_BASELINE_MAX_REPOS = int(os.getenv("SCAN_BASELINE_MAX_REPOS", 1000))
+
+# Fingerprints of the last diffed scan per (repo, dry_run)
+if shared_state is not None:
+    scan_baselines = SharedScanBaselineStore(shared_state)
+else:
+    scan_baselines = ScanBaselineStore(max_entries=SCAN_BASELINE_MAX_REPOS)
+
+HEALTH_CACHE_TTL_SECONDS = float(os.getenv("HEALTH_CACHE_TTL_SECONDS", 5.0))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 5.0))
+
+BULK_SCAN_CONCURRENCY = int(os.getenv("BULK_SCAN_CONCURRENCY", 5))
+BULK_SCAN_MAX_CONCURRENCY = int(os.getenv("BULK_SCAN_MAX_CONCURRENCY", 20))
+
+LIST_JOBS_MAX_LIMIT = 100
+LIST_JOBS_CONCURRENCY = int(os.getenv("LIST_JOBS_CONCURRENCY", 4))
+LIST_JOBS_MAX_CONCURRENCY = int(os.getenv("LIST_JOBS_MAX_CONCURRENCY", 10))
+# Active jobs in the local index are re-fetched when older than this
+JOB_INDEX_SYNC_INTERVAL = float(os.getenv("JOB_INDEX_SYNC_INTERVAL", 5.0))
+
+BULK_JOB_MAX_JOBS = int(os.getenv("BULK_JOB_MAX_JOBS", 5000))
+BULK_JOB_CONCURRENCY = int(os.getenv("BULK_JOB_CONCURRENCY", 8))
+BULK_JOB_MAX_CONCURRENCY = int(os.getenv("BULK_JOB_MAX_CONCURRENCY", 32))
+# Job calls started per second by all bulk job tool calls together; 0 = no limit
+BULK_JOB_RATE = float(os.getenv("BULK_JOB_RATE", 20.0))
+
+bulk_job_limiter = RateLimiter(BULK_JOB_RATE, burst=BULK_JOB_CONCURRENCY)
+
+# Columns of the per-job outcome table of the bulk job tools
+BULK_JOB_COLUMNS = ["job_id", "repo_url", "status", "code"]
+
+JOB_POLL_INITIAL_INTERVAL = float(os.getenv("JOB_POLL_INITIAL_INTERVAL", 1.0))
+JOB_POLL_MAX_INTERVAL = float(os.getenv("JOB_POLL_MAX_INTERVAL", 30.0))
+JOB_WAIT_MAX_TIMEOUT = float(os.getenv("JOB_WAIT_MAX_TIMEOUT", 3600.0))
+# Fallback polling interval used while job completion callbacks are enabled
+JOB_CALLBACK_POLL_INTERVAL = float(os.getenv("JOB_CALLBACK_POLL_INTERVAL", 60.0))
+
+# Enables the admin tools; callers must pass the same token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Identical scans and scan-and-fix starts that are running right now, in any worker
+scan_flights = SingleFlight(shared=SharedFlight(shared_state, "scan_flight") if shared_state is not None else None)
+scan_and_fix_flights = SingleFlight(shared=SharedFlight(shared_state, "scan_and_fix_flight") if shared_state is not None else None)
+
+# Last scan-and-fix job started for each (repo, dry_run); in the shared store when there is one
+active_scan_and_fix_jobs = {}
+ACTIVE_JOB_TTL_SECONDS = 24 * 3600
 
 def initialize_tool(mcp):
     logger.info("Initializing Dependency Scanner Tools...")
-    mcp.tool(name="Scan for Vulnerabilities")(scan_for_vulnerabilities)
-    mcp.tool(name="Scan and Fix Vulnerabilities")(scan_and_fix_vulnerabilities)
-    mcp.tool(name="Get Scan and Fix Job Status")(get_scan_and_fix_job_status)
-    mcp.tool(name="Delete Scan and Fix Job")(delete_scan_and_fix_job)
-    mcp.tool(name="List Scan and Fix Jobs")(list_scan_and_fix_jobs)
-    mcp.tool(name="Health Check")(health_check)
-    mcp.tool(name="Service Status")(service_status)
-
-async def scan_for_vulnerabilities(repo_url: str, github_pat: str, assignee: str, dry_run: bool):
+    open_client()
+    _register(mcp, "Scan for Vulnerabilities", scan_for_vulnerabilities)
+    _register(mcp, "Get Vulnerabilities Page", get_vulnerabilities_page)
+    _register(mcp, "Scan Multiple Repositories", scan_multiple_repositories)
+    _register(mcp, "Scan and Fix Vulnerabilities", scan_and_fix_vulnerabilities)
+    _register(mcp, "Get Scan and Fix Job Status", get_scan_and_fix_job_status)
+    _register(mcp, "Wait for Scan and Fix Job", wait_for_job)
+    _register(mcp, "Delete Scan and Fix Job", delete_scan_and_fix_job)
+    _register(mcp, "List Scan and Fix Jobs", list_scan_and_fix_jobs)
+    _register(mcp, "Bulk Delete Scan and Fix Jobs", bulk_delete_scan_and_fix_jobs)
+    _register(mcp, "Bulk Get Scan and Fix Job Status", bulk_get_scan_and_fix_job_status)
+    _register(mcp, "Health Check", health_check)
+    _register(mcp, "Service Status", service_status)
+    _register(mcp, "Get Scan Cache Stats", get_scan_cache_stats)
+    _register(mcp, "Vulnerability Analytics", vulnerability_analytics)
+    if ADMIN_TOKEN:
+        _register(mcp, "Dump Slow Calls", dump_slow_calls)
+
+def _register(mcp, name: str, fn):
+    """Registers a tool wrapped with call metrics."""
+    mcp.tool(name=name)(instrument_tool(fn))
+
+async def shutdown_tool():
+    logger.info("Shutting down Dependency Scanner Tools...")
+    await health_probe.stop()
+    await status_probe.stop()
+    await backend_pool.stop()
+    await metrics.stop()
+    await job_events.stop()
+    slow_calls.stop()
+    await close_client()
+    job_index.close()
+    if shared_state is not None:
+        shared_state.close()
+
+def _is_error(result) -> bool:
+    """True for the error dicts returned by the tools."""
+    return isinstance(result, dict) and result.get("status") == "error" and "code" in result
+
+def _intern_cves(result):
+    """Records the CVEs in a response's vulnerability list and shares their metadata."""
+    vulnerabilities = result.get("vulnerabilities") if isinstance(result, dict) else None
+    if isinstance(vulnerabilities, list):
+        cve_table.intern(vulnerabilities)
+
+def _decode(response):
+    """Decodes a backend response body; one that is not JSON is reported as a backend error."""
+    try:
+        return decode_response(response)
+    except ValueError as e:
+        raise InvalidResponseError(f"Backend returned invalid JSON: {str(e)}") from e
+
+def _compact_result(result: dict, key: str = "vulnerabilities") -> dict:
+    """Returns a copy of a result with the CVE fields of result[key] moved to a "cves" table."""
+    if not isinstance(result.get(key), list):
+        return result
+    rows, cves = compact_vulnerabilities(result[key])
+    return {**result, key: rows, "cves": cves}
+
+async def scan_for_vulnerabilities(
+    repo_url: str,
+    github_pat: str,
+    assignee: str,
+    dry_run: bool,
+    bypass_cache: bool = False,
+    severity: str = "",
+    min_cvs_score: float | None = None,
+    package_manager: str = "",
+    file_path_prefix: str = "",
+    fields: list[str] | None = None,
+    page_size: int = 0,
+    diff_since_last: bool = False,
+    compact: bool = False
+):
     """
     Scans the repository for dependency vulnerabilities using the AUTH_SERVICE_URL /api/v1/scan endpoint.
 
@@ -33,6 +209,27 @@ async def scan_for_vulnerabilities(repo_url: str, github_pat: str, assignee: str
         github_pat (str): GitHub Personal Access Token.
         assignee (str): User to assign vulnerabilities to.
         dry_run (bool): If True, performs a dry run.
+        bypass_cache (bool): If True, always calls the scan endpoint and refreshes the cached result.
+        severity (str, optional): Only return these severities, comma-separated (e.g. "high,critical").
+        min_cvs_score (float, optional): Only return vulnerabilities with at least this CVSS score.
+        package_manager (str, optional): Only return vulnerabilities for this package manager (e.g. npm).
+        file_path_prefix (str, optional): Only return vulnerabilities in files under this path.
+        fields (list[str], optional): Only return these vulnerability fields.
+        page_size (int): Return at most this many vulnerabilities and a cursor for the rest
+            (default: 0 = all, max: VULN_PAGE_MAX_SIZE). Use "Get Vulnerabilities Page" with
+            the cursor to read the next page without rescanning.
+        diff_since_last (bool): If True, returns only what changed since the last diff_since_last
+            scan of this repository instead of the full list. Vulnerabilities are matched on
+            (package_name, cve, file_path, current_version). Filters and fields apply to the
+            added entries; page_size is ignored.
+        compact (bool): If True, each vulnerability is returned without its description,
+            cvs_score and severity, which are given once per CVE in a "cves" table instead.
+
+    Results are cached per (repository, HEAD commit, dry_run). The HEAD commit is
+    resolved through the GitHub API with the given token, so a repository that has
+    not changed since the last scan is answered without calling the backend.
+    Identical scans requested while one is already running share its result
+    instead of sending another request.
 
     Returns:
         dict: If response is 200, returns:
@@ -56,6 +253,36 @@ async def scan_for_vulnerabilities(repo_url: str, github_pat: str, assignee: str
                     ...
                 ]
             }
+        If any filter, fields or page_size is given, "vulnerabilities" holds only the
+        matching page and the result also has:
+            {
+                "matched_count": int,           # vulnerabilities passing the filters
+                "next_cursor": str | None       # cursor for the next page
+            }
+        If diff_since_last is True, "vulnerabilities" is replaced by:
+            {
+                "baseline_scan_time": str | None,   # None if there was no earlier scan to compare with
+                "added_count": int,
+                "removed_count": int,
+                "unchanged_count": int,
+                "added": [dict, ...],               # new vulnerabilities, shaped as above
+                "removed": [                        # vulnerabilities no longer found
+                    {"package_name": str, "cve": str, "file_path": str, "current_version": str},
+                    ...
+                ]
+            }
+        If compact is True, the vulnerabilities (or added entries) keep every field but
+        description, cvs_score and severity, and the result also has:
+            {
+                "cves": {
+                    str: {                      # CVE identifier
+                        "cvs_score": float,
+                        "description": str,
+                        "severity": str
+                    },
+                    ...
+                }
+            }
         If response is 422 (validation error), returns:
             {
                 "status": "error",
@@ -72,7 +299,182 @@ async def scan_for_vulnerabilities(repo_url: str, github_pat: str, assignee: str
     Raises:
         EnvironmentError: If the AUTH_SERVICE_URL is not set in environment variables.
     """
-    api_url = f"{API_BASE_URL}/api/v1/scan"
+    unknown_fields = [field for field in fields or [] if field not in VULNERABILITY_FIELDS]
+    if unknown_fields:
+        return {
+            "status": "error",
+            "code": 422,
+            "message": f"Unknown vulnerability fields: {', '.join(unknown_fields)}"
+        }
+    if compact and fields and "cve" not in fields:
+        # Compact entries refer to the "cves" table by CVE id.
+        fields = [*fields, "cve"]
+
+    result = None
+    cache_key = None
+    if scan_cache.enabled:
+        commit = await resolve_head_commit(repo_url, github_pat)
+        if commit:
+            cache_key = (normalize_repo_url(repo_url), commit, dry_run)
+            if not bypass_cache:
+                result = scan_cache.get(cache_key)
+                if result is None and shared_state is not None:
+                    result = await shared_state.get("scan_result", cache_key)
+                    if result is not None:
+                        scan_cache.put(cache_key, result)
+                if result is not None:
+                    logger.info(f"Scan cache hit for repo: {repo_url} at commit {commit}")
+
+    if result is None:
+        if cache_key is not None:
+            flight_key = cache_key
+        else:
+            # Without a resolved commit the token is part of the key, so callers
+            # never share a result they could not have fetched themselves.
+            token_digest = hashlib.sha256(github_pat.encode()).hexdigest()
+            flight_key = (normalize_repo_url(repo_url), dry_run, token_digest)
+        result = await scan_flights.do(flight_key, _request_scan, repo_url, github_pat, assignee, dry_run, cache_key)
+
+    if _is_error(result):
+        return result
+    if diff_since_last:
+        diff = await _diff_scan_result(repo_url, dry_run, result, severity, min_cvs_score, package_manager, file_path_prefix, fields)
+        return _compact_result(diff, "added") if compact else diff
+    if not (severity or min_cvs_score is not None or package_manager or file_path_prefix or fields or page_size):
+        return _compact_result(result) if compact else result
+    return await _paginate_scan_result(result, severity, min_cvs_score, package_manager, file_path_prefix, fields, page_size, compact)
+
+async def _diff_scan_result(
+    repo_url: str,
+    dry_run: bool,
+    result: dict,
+    severity: str,
+    min_cvs_score: float | None,
+    package_manager: str,
+    file_path_prefix: str,
+    fields: list[str] | None
+):
+    """Compares a scan result with the repository's baseline and returns only the changes."""
+    diff = await scan_baselines.diff(
+        (normalize_repo_url(repo_url), dry_run),
+        result.get("scan_time"),
+        result.get("vulnerabilities") or []
+    )
+    added = filter_vulnerabilities(
+        diff["added"],
+        severities=parse_severities(severity),
+        min_cvs_score=min_cvs_score,
+        package_manager=package_manager,
+        file_path_prefix=file_path_prefix
+    )
+    logger.info(
+        f"Scan diff for repo: {repo_url} - {len(diff['added'])} added, "
+        f"{len(diff['removed'])} removed, {diff['unchanged_count']} unchanged"
+    )
+    scan = {key: value for key, value in result.items() if key != "vulnerabilities"}
+    return {
+        **scan,
+        "baseline_scan_time": diff["baseline_scan_time"],
+        "added_count": len(diff["added"]),
+        "removed_count": len(diff["removed"]),
+        "unchanged_count": diff["unchanged_count"],
+        "added": project(added, fields),
+        "removed": diff["removed"]
+    }
+
+async def _paginate_scan_result(
+    result: dict,
+    severity: str,
+    min_cvs_score: float | None,
+    package_manager: str,
+    file_path_prefix: str,
+    fields: list[str] | None,
+    page_size: int,
+    compact: bool = False
+):
+    """Filters a scan result and returns its first page, storing the rest as a view."""
+    matched = filter_vulnerabilities(
+        result.get("vulnerabilities") or [],
+        severities=parse_severities(severity),
+        min_cvs_score=min_cvs_score,
+        package_manager=package_manager,
+        file_path_prefix=file_path_prefix
+    )
+    scan = {key: value for key, value in result.items() if key != "vulnerabilities"}
+    page_size = max(0, min(page_size, VULN_PAGE_MAX_SIZE))
+    next_cursor = None
+    if page_size and len(matched) > page_size:
+        view_id = await scan_views.create(scan, matched, fields, page_size, compact=compact)
+        if view_id is None:
+            logger.warning(f"Filtered scan result too large to keep for paging: {len(matched)} vulnerabilities")
+        else:
+            next_cursor = encode_cursor(view_id, page_size)
+        matched_page = matched[:page_size]
+    else:
+        matched_page = matched
+    page = {
+        **scan,
+        "matched_count": len(matched),
+        "vulnerabilities": project(matched_page, fields),
+        "next_cursor": next_cursor
+    }
+    return _compact_result(page) if compact else page
+
+async def get_vulnerabilities_page(cursor: str):
+    """
+    Returns the next page of a filtered "Scan for Vulnerabilities" result.
+
+    Pages are read from the copy kept when the scan was filtered, so no new scan is made.
+
+    Args:
+        cursor (str): The next_cursor value from a previous page.
+
+    Returns:
+        dict: Returns the same fields as the first page:
+            {
+                "repository": str,
+                "scan_time": str,
+                "status": str,
+                "total_count": int,
+                "matched_count": int,
+                "vulnerabilities": [dict, ...],
+                "next_cursor": str | None
+            }
+        If the first page was compact, so is this one, with its own "cves" table.
+        If the cursor is malformed, returns:
+            {
+                "status": "error",
+                "code": 422,
+                "message": str
+            }
+        If the stored copy has expired, returns:
+            {
+                "status": "error",
+                "code": 410,
+                "message": str
+            }
+    """
+    try:
+        view_id, offset = decode_cursor(cursor)
+        view, items, next_offset = await scan_views.page(view_id, offset)
+    except CursorError as e:
+        logger.warning(f"Invalid vulnerabilities cursor - {str(e)}")
+        return {
+            "status": "error",
+            "code": e.code,
+            "message": str(e)
+        }
+    page = {
+        **view["scan"],
+        "matched_count": view["matched_count"],
+        "vulnerabilities": items,
+        "next_cursor": encode_cursor(view_id, next_offset) if next_offset is not None else None
+    }
+    return _compact_result(page) if view.get("compact") else page
+
+async def _request_scan(repo_url: str, github_pat: str, assignee: str, dry_run: bool, cache_key):
+    """Sends one scan request to the backend and caches a successful result."""
+    api_path = "/api/v1/scan"
 
     headers = {
         "Content-Type": "application/json"
@@ -84,35 +486,168 @@ async def scan_for_vulnerabilities(repo_url: str, github_pat: str, assignee: str
         "dry_run": dry_run
     }
 
-    logger.info(f"Sending vulnerability scan request to {api_url} for repo: {repo_url}")
+    logger.info(f"Sending vulnerability scan request to {api_path} for repo: {repo_url}")
     try:
-        response = requests.post(api_url, json=payload, headers=headers)
-        logger.info(f"Received response with status code: {response.status_code}")
-        if response.status_code == 200:
-            logger.info(f"Scan successful for repo: {repo_url}")
-            return response.json()
-        elif response.status_code == 422:
+        # Scan results can be many megabytes, so the body is decoded as it streams in,
+        # keeping the backend slot until it has been read.
+        async with backend_pool.stream("scan", "POST", api_path, json=payload, headers=headers) as (response, _):
+            logger.info(f"Received response with status code: {response.status_code}")
+            if response.status_code == 200:
+                logger.info(f"Scan successful for repo: {repo_url}")
+                try:
+                    with phase("json_decode"):
+                        result = await decode_response_stream(response)
+                except httpx.TimeoutException as e:
+                    raise BackendTimeoutError(f"Reading scan result for {repo_url} timed out: {type(e).__name__}") from e
+                except httpx.HTTPError as e:
+                    raise BackendError(f"Reading scan result for {repo_url} failed: {str(e) or type(e).__name__}") from e
+                except ValueError as e:
+                    raise InvalidResponseError(f"Scan result for {repo_url} is not a valid JSON object: {str(e)}") from e
+                finally:
+                    await response.aclose()
+                    metrics.observe_backend_body("scan", response)
+        if response.status_code == 422:
             logger.warning(f"Validation error for repo: {repo_url} - {response.text}")
             return {
                 "status": "error",
                 "code": 422,
                 "message": response.text
             }
-        else:
+        if response.status_code != 200:
             logger.error(f"Unexpected error for repo: {repo_url} - {response.status_code}: {response.text}")
             return {
                 "status": "error",
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during scan for repo: {repo_url} - {str(e)}")
+        with phase("cve_intern"):
+            _intern_cves(result)
+        if cache_key is not None:
+            with phase("cache_store"):
+                scan_cache.put(cache_key, result)
+            if shared_state is not None:
+                with phase("shared_cache_store"):
+                    await shared_state.put("scan_result", cache_key, result, SCAN_CACHE_TTL_SECONDS, SHARED_SCAN_CACHE_MAX_BYTES)
+        if findings_store is not None and isinstance(result.get("vulnerabilities"), list):
+            with phase("analytics_store"):
+                findings_store.add_scan(normalize_repo_url(repo_url), result["vulnerabilities"])
+        return result
+    except BackendError as e:
+        logger.error(f"BackendError during scan for repo: {repo_url} - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
         
+async def scan_multiple_repositories(
+    repo_urls: list[str],
+    github_pat: str,
+    assignee: str,
+    dry_run: bool,
+    max_concurrency: int = BULK_SCAN_CONCURRENCY,
+    bypass_cache: bool = False,
+    compact: bool = False
+):
+    """
+    Scans several repositories for dependency vulnerabilities concurrently.
+
+    Each repository goes through "Scan for Vulnerabilities", so cached results and
+    in-flight deduplication apply. At most max_concurrency scans run at once. A
+    failed repository is reported in its own entry and does not stop the others.
+
+    Args:
+        repo_urls (list[str]): The URLs of the repositories to scan. Duplicates are scanned once.
+        github_pat (str): GitHub Personal Access Token.
+        assignee (str): User to assign vulnerabilities to.
+        dry_run (bool): If True, performs a dry run.
+        max_concurrency (int): Number of scans to run at once (default: 5, capped by BULK_SCAN_MAX_CONCURRENCY).
+        bypass_cache (bool): If True, ignores cached scan results.
+        compact (bool): If True, vulnerabilities are returned without description, cvs_score
+            and severity, which are given once per CVE across all repositories in "cves".
+
+    Returns:
+        dict: Returns:
+            {
+                "results": [
+                    {
+                        "repo_url": str,
+                        "status": "success",
+                        "result": dict          # same as "Scan for Vulnerabilities"
+                    },
+                    {
+                        "repo_url": str,
+                        "status": "error",
+                        "code": int,
+                        "message": str
+                    },
+                    ...
+                ],
+                "summary": {
+                    "total_repos": int,
+                    "succeeded": int,
+                    "failed": int,
+                    "total_vulnerabilities": int,
+                    "by_severity": dict,        # severity -> count
+                    "duration_seconds": float
+                },
+                "cves": dict                    # only if compact; CVE identifier -> CVE fields
+            }
+    """
+    unique_urls = list(dict.fromkeys(repo_urls))
+    concurrency = max(1, min(max_concurrency, BULK_SCAN_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.monotonic()
+
+    async def scan_one(url: str):
+        async with semaphore:
+            try:
+                result = await scan_for_vulnerabilities(url, github_pat, assignee, dry_run, bypass_cache=bypass_cache)
+            except Exception as e:
+                logger.error(f"Unexpected error during bulk scan for repo: {url} - {str(e)}")
+                return {"repo_url": url, "status": "error", "code": 500, "message": str(e)}
+        if _is_error(result):
+            return {"repo_url": url, "status": "error", "code": result["code"], "message": result["message"]}
+        return {"repo_url": url, "status": "success", "result": result}
+
+    logger.info(f"Starting bulk scan of {len(unique_urls)} repositories with concurrency {concurrency}")
+    results = await asyncio.gather(*(scan_one(url) for url in unique_urls))
+
+    by_severity = {}
+    total_vulnerabilities = 0
+    for entry in results:
+        if entry["status"] != "success":
+            continue
+        for vulnerability in entry["result"].get("vulnerabilities") or []:
+            severity = str(vulnerability.get("severity") or "unknown").lower()
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+            total_vulnerabilities += 1
+    succeeded = sum(1 for entry in results if entry["status"] == "success")
+    summary = {
+        "total_repos": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "total_vulnerabilities": total_vulnerabilities,
+        "by_severity": by_severity,
+        "duration_seconds": round(time.monotonic() - started, 3)
+    }
+    logger.info(f"Bulk scan finished: {succeeded}/{len(results)} repositories succeeded")
+    if not compact:
+        return {
+            "results": results,
+            "summary": summary
+        }
+    cves = {}
+    for entry in results:
+        if entry["status"] == "success" and isinstance(entry["result"].get("vulnerabilities"), list):
+            rows, cves = compact_vulnerabilities(entry["result"]["vulnerabilities"], cves)
+            entry["result"] = {**entry["result"], "vulnerabilities": rows}
+    return {
+        "results": results,
+        "summary": summary,
+        "cves": cves
+    }
+
 async def scan_and_fix_vulnerabilities(
     repo_url: str,
     github_pat: str,
@@ -123,7 +658,9 @@ async def scan_and_fix_vulnerabilities(
     jira_reporter_id: str,
     jira_custom_fields: dict,
     assignee: str,
-    dry_run: bool
+    dry_run: bool,
+    reuse_active_job: bool = False,
+    compact: bool = False
 ):
     """
     Scans the repository for vulnerable dependencies and attempts to automatically fix them.
@@ -146,6 +683,11 @@ async def scan_and_fix_vulnerabilities(
         jira_custom_fields (dict): Custom fields for JIRA ticket creation.
         assignee (str): User to assign vulnerabilities to.
         dry_run (bool): If True, performs a dry run without making changes.
+        reuse_active_job (bool): If True and a job started by this service for the same
+            repository and dry_run is still queued or running, returns that job instead
+            of starting a new one. Concurrent calls in this mode start at most one job.
+        compact (bool): If True, the severity of each vulnerability is given once per CVE
+            in a "cves" table instead.
 
     Returns:
         dict: If response is 202, returns:
@@ -172,6 +714,15 @@ async def scan_and_fix_vulnerabilities(
                     ...
                 ]
             }
+        If an active job was reused, returns:
+            {
+                "job_id": str,
+                "status": str,
+                "status_url": str,
+                "repository": str,
+                "message": str,
+                "reused": true
+            }
         If response is 422 (validation error), returns:
             {
                 "status": "error",
@@ -187,11 +738,9 @@ async def scan_and_fix_vulnerabilities(
 
     Note:
         This is an asynchronous operation. Use the returned 'job_id' to track progress via /api/v1/jobs/{job_id}.
+        When JOB_CALLBACK_BASE_URL is set, the request asks the backend to POST to this
+        service's /callbacks/jobs route when the job changes state.
     """
-    api_url = f"{API_BASE_URL}/api/v1/scan-and-fix"
-    headers = {
-        "Content-Type": "application/json"
-    }
     payload = {
         "repo_url": repo_url,
         "github_pat": github_pat,
@@ -204,14 +753,80 @@ async def scan_and_fix_vulnerabilities(
         "assignee": assignee,
         "dry_run": dry_run
     }
+    if callbacks_enabled():
+        payload["callback_url"] = callback_url()
+        if JOB_CALLBACK_SECRET:
+            payload["callback_token"] = JOB_CALLBACK_SECRET
+
+    if reuse_active_job:
+        job_key = (normalize_repo_url(repo_url), dry_run)
+        result = await scan_and_fix_flights.do(job_key, _reuse_or_start_scan_and_fix, job_key, payload)
+    else:
+        result = await _start_scan_and_fix(payload)
+    return _compact_result(result) if compact and not _is_error(result) else result
+
+async def _reuse_or_start_scan_and_fix(job_key: tuple, payload: dict):
+    """Returns the active job recorded for job_key, or starts a new one."""
+    repo_url = payload["repo_url"]
+    job_id = await _get_active_job(job_key)
+    if job_id:
+        job = await get_scan_and_fix_job_status(job_id)
+        if is_active_status(job.get("status")):
+            logger.info(f"Reusing active scan-and-fix job {job_id} for repo: {repo_url}")
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "status_url": f"/api/v1/jobs/{job_id}",
+                "repository": repo_url,
+                "message": "A scan-and-fix job is already queued or running for this repository.",
+                "reused": True
+            }
+        await _set_active_job(job_key, None)
+    return await _start_scan_and_fix(payload)
+
+async def _get_active_job(job_key: tuple) -> str | None:
+    if shared_state is not None:
+        return await shared_state.get("active_job", job_key)
+    return active_scan_and_fix_jobs.get(job_key)
+
+async def _set_active_job(job_key: tuple, job_id: str | None):
+    """Records the job started for job_key, or forgets it when job_id is None."""
+    if shared_state is not None:
+        if job_id is None:
+            await shared_state.delete("active_job", job_key)
+        else:
+            await shared_state.put("active_job", job_key, job_id, ACTIVE_JOB_TTL_SECONDS)
+    elif job_id is None:
+        active_scan_and_fix_jobs.pop(job_key, None)
+    else:
+        active_scan_and_fix_jobs[job_key] = job_id
+
+async def _start_scan_and_fix(payload: dict):
+    """Sends one scan-and-fix request to the backend and records the started job."""
+    repo_url = payload["repo_url"]
+    api_path = "/api/v1/scan-and-fix"
+    headers = {
+        "Content-Type": "application/json"
+    }
 
-    logger.info(f"Sending scan-and-fix request to {api_url} for repo: {repo_url}")
+    logger.info(f"Sending scan-and-fix request to {api_path} for repo: {repo_url}")
     try:
-        response = requests.post(api_url, json=payload, headers=headers)
+        response, backend = await backend_pool.request("scan_and_fix", "POST", api_path, json=payload, headers=headers)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 202:
             logger.info(f"Scan and fix job started for repo: {repo_url}")
-            return response.json()
+            result = _decode(response)
+            _intern_cves(result)
+            if result.get("job_id"):
+                backend_pool.pin_job(result["job_id"], backend)
+                await _set_active_job((normalize_repo_url(repo_url), payload["dry_run"]), result["job_id"])
+                await job_index.upsert([{
+                    "id": result["job_id"],
+                    "status": result.get("status") or "queued",
+                    "repo_url": repo_url,
+                    "created_at": datetime.now(timezone.utc).isoformat()
+                }])
+            return result
         elif response.status_code == 422:
             logger.warning(f"Validation error for scan-and-fix: {response.text}")
             return {
@@ -226,20 +841,24 @@ async def scan_and_fix_vulnerabilities(
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during scan-and-fix for repo: {repo_url} - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during scan-and-fix for repo: {repo_url} - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
         
-async def get_scan_and_fix_job_status(job_id: str):
+async def get_scan_and_fix_job_status(job_id: str, compact: bool = False):
     """
     Gets the current status and results of a scan-and-fix job.
 
+    Jobs that have already finished are answered from the local job index.
+
     Args:
         job_id (str): The job ID to query.
+        compact (bool): If True and the job result lists vulnerabilities, their CVE
+            fields are given once per CVE in a "cves" table of the result instead.
 
     Returns:
         dict: If response is 200, returns job status and results:
@@ -265,18 +884,34 @@ async def get_scan_and_fix_job_status(job_id: str):
                 "message": str
             }
     """
-    api_url = f"{API_BASE_URL}/api/v1/jobs/{job_id}"
+    finished = await job_index.get_finished(job_id)
+    if finished is not None:
+        logger.info(f"Serving finished job from local index for job_id: {job_id}")
+        return _compact_job(finished) if compact else finished
+
+    api_path = f"/api/v1/jobs/{job_id}"
     headers = {
         "Accept": "application/json"
     }
 
-    logger.info(f"Fetching scan-and-fix job status from {api_url}")
+    logger.info(f"Fetching scan-and-fix job status from {api_path}")
     try:
-        response = requests.get(api_url, headers=headers)
+        response, _ = await backend_pool.request("job", "GET", api_path, job_id=job_id, headers=headers)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 200:
             logger.info(f"Job status fetched successfully for job_id: {job_id}")
-            return response.json()
+            result = _decode(response)
+            _intern_cves(result.get("result"))
+            await job_index.upsert([result], detailed=True)
+            return _compact_job(result) if compact else result
+        elif response.status_code == 404:
+            logger.warning(f"Job not found for job status: {job_id}")
+            await job_index.delete(job_id)
+            return {
+                "status": "error",
+                "code": 404,
+                "message": response.text
+            }
         elif response.status_code == 422:
             logger.warning(f"Validation error for job status: {response.text}")
             return {
@@ -291,14 +926,104 @@ async def get_scan_and_fix_job_status(job_id: str):
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during job status fetch for job_id: {job_id} - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during job status fetch for job_id: {job_id} - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
         
+def _compact_job(job: dict) -> dict:
+    """Returns a copy of a job status with its result's vulnerabilities compacted."""
+    if not isinstance(job.get("result"), dict):
+        return job
+    return {**job, "result": _compact_result(job["result"])}
+
+async def wait_for_job(job_id: str, timeout_seconds: float = 600, compact: bool = False, ctx: Context | None = None):
+    """
+    Waits until a scan-and-fix job reaches a terminal state and returns its final status.
+
+    The job is polled server-side with exponential backoff and jitter, starting at
+    JOB_POLL_INITIAL_INTERVAL seconds and growing to JOB_POLL_MAX_INTERVAL. The
+    interval is reset whenever the job changes status. An MCP progress notification
+    is sent on every status change.
+
+    When job completion callbacks are enabled, the wait is woken by the callback and
+    polling only runs every JOB_CALLBACK_POLL_INTERVAL seconds in case one is missed.
+
+    Args:
+        job_id (str): The job ID to wait for.
+        timeout_seconds (float): How long to wait before giving up (default: 600, max: JOB_WAIT_MAX_TIMEOUT).
+        compact (bool): If True, the final status is compacted as by "Get Scan and Fix Job Status".
+
+    Returns:
+        dict: When the job is completed, failed or cancelled, returns the same job status
+        as "Get Scan and Fix Job Status".
+        If the deadline passes first, returns:
+            {
+                "status": "error",
+                "code": 408,
+                "message": str,
+                "last_status": str
+            }
+        If the job cannot be fetched (e.g. 404 or 422), returns:
+            {
+                "status": "error",
+                "code": int,
+                "message": str
+            }
+        A 429 from the outbound scheduler is polled again like a backend error.
+    """
+    timeout_seconds = max(0.0, min(timeout_seconds, JOB_WAIT_MAX_TIMEOUT))
+    started = time.monotonic()
+    deadline = started + timeout_seconds
+    if callbacks_enabled():
+        initial_interval = max_interval = JOB_CALLBACK_POLL_INTERVAL
+    else:
+        initial_interval, max_interval = JOB_POLL_INITIAL_INTERVAL, JOB_POLL_MAX_INTERVAL
+    interval = initial_interval
+    last_status = None
+
+    logger.info(f"Waiting up to {timeout_seconds}s for job_id: {job_id}")
+    while True:
+        fetched_at = time.monotonic()
+        job = await get_scan_and_fix_job_status(job_id, compact=compact)
+        if _is_error(job):
+            # Backend and network failures, and calls the outbound scheduler
+            # turned away, are retried until the deadline.
+            if job["code"] < 500 and job["code"] != 429:
+                return job
+        else:
+            status = job.get("status")
+            if status != last_status:
+                last_status = status
+                interval = initial_interval
+                if ctx is not None:
+                    await ctx.report_progress(
+                        progress=time.monotonic() - started,
+                        total=timeout_seconds,
+                        message=f"Job {job_id} is {status}"
+                    )
+            if is_terminal_status(status):
+                logger.info(f"Job {job_id} finished with status: {status}")
+                return job
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"Timed out waiting for job_id: {job_id} (last status: {last_status})")
+            return {
+                "status": "error",
+                "code": 408,
+                "message": f"Job {job_id} did not finish within {timeout_seconds} seconds.",
+                "last_status": last_status
+            }
+        delay = min(interval * random.uniform(0.5, 1.0), remaining)
+        if await job_events.wait(job_id, delay, since=fetched_at):
+            logger.info(f"Job callback received for job_id: {job_id}")
+            continue
+        interval = min(interval * 2, max_interval)
+
 async def delete_scan_and_fix_job(job_id: str):
     """
     Deletes a scan-and-fix job by job ID.
@@ -311,22 +1036,32 @@ async def delete_scan_and_fix_job(job_id: str):
         If response is 422 (validation error), returns error details.
         For other errors, returns error details.
     """
-    api_url = f"{API_BASE_URL}/api/v1/jobs/{job_id}"
+    api_path = f"/api/v1/jobs/{job_id}"
     headers = {
         "Accept": "application/json"
     }
 
-    logger.info(f"Deleting scan-and-fix job at {api_url}")
+    logger.info(f"Deleting scan-and-fix job at {api_path}")
     try:
-        response = requests.delete(api_url, headers=headers)
+        response, _ = await backend_pool.request("job", "DELETE", api_path, job_id=job_id, headers=headers)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 204:
             logger.info(f"Job deleted successfully for job_id: {job_id}")
+            backend_pool.forget_job(job_id)
+            await job_index.delete(job_id)
             return {
                 "status": "success",
                 "code": 204,
                 "message": f"Job {job_id} deleted successfully."
             }
+        elif response.status_code == 404:
+            logger.warning(f"Job not found for job delete: {job_id}")
+            await job_index.delete(job_id)
+            return {
+                "status": "error",
+                "code": 404,
+                "message": response.text
+            }
         elif response.status_code == 422:
             logger.warning(f"Validation error for job delete: {response.text}")
             return {
@@ -341,15 +1076,25 @@ async def delete_scan_and_fix_job(job_id: str):
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during job delete for job_id: {job_id} - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during job delete for job_id: {job_id} - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
         
-async def list_scan_and_fix_jobs(page: int = 1, limit: int = 10, status: str = "", repo_url: str = ""):
+async def list_scan_and_fix_jobs(
+    page: int = 1,
+    limit: int = 10,
+    status: str = "",
+    repo_url: str = "",
+    all_pages: bool = False,
+    max_items: int = 0,
+    max_concurrency: int = LIST_JOBS_CONCURRENCY,
+    source: str = "backend",
+    ctx: Context | None = None
+):
     """
     Lists all scan-and-fix jobs with pagination support.
 
@@ -358,6 +1103,15 @@ async def list_scan_and_fix_jobs(page: int = 1, limit: int = 10, status: str = "
         limit (int): Number of jobs per page (default: 10, max: 100).
         status (str, optional): Filter jobs by status.
         repo_url (str, optional): Filter jobs by repository URL.
+        all_pages (bool): If True, fetches every page and merges the jobs. Page 1 is fetched
+            first to learn total_pages, then the rest are fetched concurrently with pages of
+            100 jobs; page and limit are ignored.
+        max_items (int): In all_pages mode, stop after this many jobs (default: 0 = no limit).
+        max_concurrency (int): In all_pages mode, pages fetched at once (default: 4, capped by LIST_JOBS_MAX_CONCURRENCY).
+        source (str): "backend" (default) asks the backend. "index" answers from the local job
+            index of jobs this service has seen; unfinished jobs not refreshed in the last
+            JOB_INDEX_SYNC_INTERVAL seconds are re-fetched first. Jobs created elsewhere only
+            appear once a backend listing has included them.
 
     Returns:
         dict: If response is 200, returns:
@@ -379,6 +1133,21 @@ async def list_scan_and_fix_jobs(page: int = 1, limit: int = 10, status: str = "
                     "total_pages": int
                 }
             }
+        With source="index", returns the same shape plus "source": "index"; all_pages is ignored.
+        In all_pages mode, returns:
+            {
+                "jobs": [dict, ...],
+                "pagination": {
+                    "total": int,
+                    "total_pages": int,
+                    "pages_fetched": int,
+                    "truncated": bool       # True if max_items cut the list short
+                },
+                "errors": [                 # pages after the first that failed
+                    {"page": int, "code": int, "message": str},
+                    ...
+                ]
+            }
         If response is 422 (validation error), returns:
             {
                 "status": "error",
@@ -392,28 +1161,125 @@ async def list_scan_and_fix_jobs(page: int = 1, limit: int = 10, status: str = "
                 "message": str
             }
     """
-    api_url = f"{API_BASE_URL}/api/v1/jobs"
+    if source == "index":
+        return await _list_indexed_jobs(page, limit, status, repo_url, max_concurrency)
+    if source != "backend":
+        return {
+            "status": "error",
+            "code": 422,
+            "message": f"Unknown source: {source}. Use 'backend' or 'index'."
+        }
+    if all_pages:
+        return await _list_all_job_pages(status, repo_url, max_items, max_concurrency, ctx)
+    return await _fetch_jobs_page(page, limit, status, repo_url)
+
+async def _list_indexed_jobs(page: int, limit: int, status: str, repo_url: str, max_concurrency: int):
+    """Refreshes stale unfinished jobs in the local index, then pages through it."""
+    if page < 1 or not 1 <= limit <= LIST_JOBS_MAX_LIMIT:
+        return {
+            "status": "error",
+            "code": 422,
+            "message": f"page must be at least 1 and limit between 1 and {LIST_JOBS_MAX_LIMIT}."
+        }
+    # Any unfinished job may have moved into the requested status, so the
+    # status filter is not applied when picking jobs to refresh.
+    stale = await job_index.stale_active_ids(repo_url, time.time() - JOB_INDEX_SYNC_INTERVAL)
+    if stale:
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, LIST_JOBS_MAX_CONCURRENCY)))
+
+        async def sync(job_id: str):
+            async with semaphore:
+                return await get_scan_and_fix_job_status(job_id)
+
+        logger.info(f"Refreshing {len(stale)} unfinished jobs in the local job index")
+        await asyncio.gather(*(sync(job_id) for job_id in stale))
+
+    jobs, total = await job_index.query(page, limit, status, repo_url)
+    return {
+        # Listings carry job summaries only, as the backend's do
+        "jobs": [{key: value for key, value in job.items() if key != "result"} for job in jobs],
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "total_pages": -(-total // limit)
+        },
+        "source": "index"
+    }
+
+async def _list_all_job_pages(status: str, repo_url: str, max_items: int, max_concurrency: int, ctx: Context | None):
+    """Fetches page 1, then the remaining pages concurrently, and merges them in order."""
+    first = await _fetch_jobs_page(1, LIST_JOBS_MAX_LIMIT, status, repo_url)
+    if _is_error(first):
+        return first
+    pagination = first.get("pagination") or {}
+    total_pages = int(pagination.get("total_pages") or 1)
+    last_page = total_pages
+    if max_items > 0:
+        last_page = min(total_pages, -(-max_items // LIST_JOBS_MAX_LIMIT))
+
+    concurrency = max(1, min(max_concurrency, LIST_JOBS_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    fetched = 1
+
+    async def fetch(page: int):
+        nonlocal fetched
+        async with semaphore:
+            result = await _fetch_jobs_page(page, LIST_JOBS_MAX_LIMIT, status, repo_url)
+        fetched += 1
+        if ctx is not None:
+            await ctx.report_progress(progress=fetched, total=last_page, message=f"Fetched page {page} of {last_page}")
+        return result
+
+    logger.info(f"Listing {last_page} pages of scan-and-fix jobs with concurrency {concurrency}")
+    pages = [first] + await asyncio.gather(*(fetch(page) for page in range(2, last_page + 1)))
+
+    jobs = []
+    errors = []
+    for page, result in enumerate(pages, start=1):
+        if _is_error(result):
+            errors.append({"page": page, "code": result["code"], "message": result["message"]})
+        else:
+            jobs.extend(result.get("jobs") or [])
+    truncated = last_page < total_pages
+    if max_items > 0 and len(jobs) > max_items:
+        jobs = jobs[:max_items]
+        truncated = True
+    return {
+        "jobs": jobs,
+        "pagination": {
+            "total": pagination.get("total", len(jobs)),
+            "total_pages": total_pages,
+            "pages_fetched": len(pages),
+            "truncated": truncated
+        },
+        "errors": errors
+    }
+
+async def _fetch_jobs_page(page: int, limit: int, status: str, repo_url: str):
+    """Fetches one page of jobs from the backend."""
+    api_path = "/api/v1/jobs"
     headers = {
         "Accept": "application/json"
     }
     params = {
         "page": page,
-        "limit": limit,
-        "status": "",
-        "repo_url": ""
+        "limit": limit
     }
     if status:
         params["status"] = status
     if repo_url:
         params["repo_url"] = repo_url
 
-    logger.info(f"Listing scan-and-fix jobs from {api_url} with params: {params}")
+    logger.info(f"Listing scan-and-fix jobs from {api_path} with params: {params}")
     try:
-        response = requests.get(api_url, headers=headers, params=params)
+        response, _ = await backend_pool.request("jobs", "GET", api_path, headers=headers, params=params)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 200:
             logger.info("Jobs listed successfully.")
-            return response.json()
+            result = _decode(response)
+            await job_index.upsert(result.get("jobs") or [])
+            return result
         elif response.status_code == 422:
             logger.warning(f"Validation error for job listing: {response.text}")
             return {
@@ -428,44 +1294,264 @@ async def list_scan_and_fix_jobs(page: int = 1, limit: int = 10, status: str = "
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during job listing - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during job listing - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
         
+async def bulk_delete_scan_and_fix_jobs(
+    job_ids: list[str] | None = None,
+    status: str = "",
+    repo_url: str = "",
+    dry_run: bool = False,
+    max_jobs: int = BULK_JOB_MAX_JOBS,
+    max_concurrency: int = BULK_JOB_CONCURRENCY,
+    ctx: Context | None = None
+):
+    """
+    Deletes many scan-and-fix jobs, given by ID or by a status/repo_url filter.
+
+    Each job goes through "Delete Scan and Fix Job". At most max_concurrency
+    deletes run at once, and all bulk job tool calls together start at most
+    BULK_JOB_RATE per second. A failed delete is reported in its row and does
+    not stop the others.
+
+    Args:
+        job_ids (list[str], optional): The job IDs to delete. Duplicates are deleted once.
+        status (str, optional): Without job_ids, delete the jobs with this status.
+        repo_url (str, optional): Without job_ids, delete the jobs of this repository.
+            The filters are resolved through "List Scan and Fix Jobs" with all_pages;
+            at least one of job_ids, status and repo_url is required.
+        dry_run (bool): If True, returns the jobs that would be deleted without deleting them.
+        max_jobs (int): Most jobs handled in one call (default and max: BULK_JOB_MAX_JOBS).
+        max_concurrency (int): Deletes run at once (default: 8, capped by BULK_JOB_MAX_CONCURRENCY).
+
+    Returns:
+        dict: Returns:
+            {
+                "columns": ["job_id", "repo_url", "status", "code"],
+                "rows": [
+                    [str, str, str, int],   # status as listed before the delete, None when
+                    ...                     # job_ids were given; code 204 when deleted,
+                ],                          # None in a dry run
+                "errors": [                 # failed deletes
+                    {"job_id": str, "code": int, "message": str},
+                    ...
+                ],
+                "summary": {
+                    "total": int,
+                    "succeeded": int,
+                    "failed": int,
+                    "by_code": dict,        # response code -> count
+                    "dry_run": bool,
+                    "duration_seconds": float
+                },
+                "listing": {                # only for filters
+                    "total": int,
+                    "truncated": bool,      # True if max_jobs left matching jobs out
+                    "errors": list          # listing pages that failed
+                }
+            }
+        If neither job_ids nor a filter is given, or there are more than max_jobs job_ids:
+            {
+                "status": "error",
+                "code": 422,
+                "message": str
+            }
+        If the first page of the listing fails, returns its error.
+    """
+    return await _run_bulk_jobs(
+        "delete", delete_scan_and_fix_job, 204,
+        job_ids, status, repo_url, dry_run, max_jobs, max_concurrency, ctx
+    )
+
+async def bulk_get_scan_and_fix_job_status(
+    job_ids: list[str] | None = None,
+    status: str = "",
+    repo_url: str = "",
+    dry_run: bool = False,
+    max_jobs: int = BULK_JOB_MAX_JOBS,
+    max_concurrency: int = BULK_JOB_CONCURRENCY,
+    ctx: Context | None = None
+):
+    """
+    Gets the current status of many scan-and-fix jobs, given by ID or by a status/repo_url filter.
+
+    Each job goes through "Get Scan and Fix Job Status", so finished jobs are
+    answered from the local job index. Only the status of each job is returned,
+    not its result. Concurrency and rate are limited as for "Bulk Delete Scan
+    and Fix Jobs".
+
+    Args:
+        job_ids (list[str], optional): The job IDs to query. Duplicates are queried once.
+        status (str, optional): Without job_ids, query the jobs listed with this status.
+        repo_url (str, optional): Without job_ids, query the jobs of this repository.
+            At least one of job_ids, status and repo_url is required.
+        dry_run (bool): If True, returns the jobs that would be queried without querying them.
+        max_jobs (int): Most jobs handled in one call (default and max: BULK_JOB_MAX_JOBS).
+        max_concurrency (int): Status fetches run at once (default: 8, capped by BULK_JOB_MAX_CONCURRENCY).
+
+    Returns:
+        dict: The same shape as "Bulk Delete Scan and Fix Jobs", where each row has the
+        job's current repo_url and status and code 200 once fetched.
+    """
+    return await _run_bulk_jobs(
+        "status", get_scan_and_fix_job_status, 200,
+        job_ids, status, repo_url, dry_run, max_jobs, max_concurrency, ctx
+    )
+
+async def _run_bulk_jobs(
+    action: str,
+    call,
+    success_code: int,
+    job_ids: list[str] | None,
+    status: str,
+    repo_url: str,
+    dry_run: bool,
+    max_jobs: int,
+    max_concurrency: int,
+    ctx: Context | None
+):
+    """Resolves the jobs of a bulk job tool call, runs `call` on each and builds the outcome table."""
+    started = time.monotonic()
+    max_jobs = max(1, min(max_jobs, BULK_JOB_MAX_JOBS))
+    listing = None
+    if job_ids:
+        unique_ids = list(dict.fromkeys(job_ids))
+        if len(unique_ids) > max_jobs:
+            return {
+                "status": "error",
+                "code": 422,
+                "message": f"At most {max_jobs} job IDs can be given in one call."
+            }
+        jobs = {job_id: {} for job_id in unique_ids}
+    elif status or repo_url:
+        with phase("bulk_listing"):
+            listed = await _list_all_job_pages(status, repo_url, max_jobs, LIST_JOBS_CONCURRENCY, None)
+        if _is_error(listed):
+            return listed
+        jobs = {job["id"]: job for job in listed["jobs"] if job.get("id")}
+        listing = {
+            "total": listed["pagination"]["total"],
+            "truncated": listed["pagination"]["truncated"],
+            "errors": listed["errors"]
+        }
+    else:
+        return {
+            "status": "error",
+            "code": 422,
+            "message": "Pass job_ids, or a status or repo_url filter."
+        }
+
+    if dry_run:
+        rows = [[job_id, job.get("repo_url"), job.get("status"), None] for job_id, job in jobs.items()]
+        errors = []
+    else:
+        rows, errors = await _call_bulk_jobs(action, call, success_code, jobs, max_concurrency, ctx)
+
+    by_code = {}
+    for row in rows:
+        if row[3] is not None:
+            by_code[str(row[3])] = by_code.get(str(row[3]), 0) + 1
+    result = {
+        "columns": BULK_JOB_COLUMNS,
+        "rows": rows,
+        "errors": errors,
+        "summary": {
+            "total": len(rows),
+            "succeeded": 0 if dry_run else len(rows) - len(errors),
+            "failed": len(errors),
+            "by_code": by_code,
+            "dry_run": dry_run,
+            "duration_seconds": round(time.monotonic() - started, 3)
+        }
+    }
+    if listing is not None:
+        result["listing"] = listing
+    return result
+
+async def _call_bulk_jobs(action: str, call, success_code: int, jobs: dict, max_concurrency: int, ctx: Context | None):
+    """Runs `call` on each job under the concurrency and rate limits; returns (rows, errors) in job order."""
+    concurrency = max(1, min(max_concurrency, BULK_JOB_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    total = len(jobs)
+    # Progress is reported about every 1%, not for each of thousands of jobs.
+    report_every = max(1, total // 100)
+    done = 0
+
+    async def run_one(job_id: str, listed: dict):
+        nonlocal done
+        async with semaphore:
+            await bulk_job_limiter.acquire()
+            try:
+                result = await call(job_id)
+            except Exception as e:
+                logger.error(f"Unexpected error during bulk job {action} for job_id: {job_id} - {str(e)}")
+                result = {"status": "error", "code": 500, "message": str(e)}
+        done += 1
+        if ctx is not None and (done % report_every == 0 or done == total):
+            await ctx.report_progress(progress=done, total=total, message=f"{done} of {total} jobs done")
+        if _is_error(result):
+            return [job_id, listed.get("repo_url"), listed.get("status"), result["code"]], result["message"]
+        if action == "status":
+            return [job_id, result.get("repo_url"), result.get("status"), success_code], None
+        return [job_id, listed.get("repo_url"), listed.get("status"), success_code], None
+
+    logger.info(f"Starting bulk job {action} of {total} jobs with concurrency {concurrency}")
+    outcomes = await asyncio.gather(*(run_one(job_id, listed) for job_id, listed in jobs.items()))
+    rows = [row for row, _ in outcomes]
+    errors = [
+        {"job_id": row[0], "code": row[3], "message": message}
+        for row, message in outcomes if message is not None
+    ]
+    logger.info(f"Bulk job {action} finished: {total - len(errors)}/{total} jobs succeeded")
+    return rows, errors
+
 async def health_check():
     """
     Checks if the service is healthy and running.
 
+    The result is served from memory and refreshed in the background every
+    HEALTH_CACHE_TTL_SECONDS, so an unreachable backend is reported immediately
+    with the error from the last probe.
+
     Returns:
         dict: If response is 200, returns:
             {
                 "status": str,
                 "version": str,
-                "timestamp": str
+                "timestamp": str,
+                "cache_age_seconds": float,     # age of this result
+                "last_success_at": str | None   # time of the last successful probe (UTC)
             }
         For other errors, returns:
             {
                 "status": "error",
                 "code": int,
-                "message": str
+                "message": str,
+                "cache_age_seconds": float,
+                "last_success_at": str | None
             }
     """
-    api_url = f"{API_BASE_URL}/health"
+    return await health_probe.get()
+
+async def _fetch_health():
+    """Calls /health once."""
+    api_path = "/health"
     headers = {
         "Accept": "application/json"
     }
 
-    logger.info(f"Performing health check at {api_url}")
+    logger.info(f"Performing health check at {api_path}")
     try:
-        response = requests.get(api_url, headers=headers)
+        response, _ = await backend_pool.request("health", "GET", api_path, headers=headers)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 200:
             logger.info("Service health check successful.")
-            return response.json()
+            return _decode(response)
         else:
             logger.error(f"Health check failed: {response.status_code}: {response.text}")
             return {
@@ -473,11 +1559,11 @@ async def health_check():
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during health check - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during health check - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
         }
 
@@ -485,6 +1571,9 @@ async def service_status():
     """
     Gets detailed service status including uptime and dependencies.
 
+    The result is served from memory and refreshed in the background every
+    HEALTH_CACHE_TTL_SECONDS, like "Health Check".
+
     Returns:
         dict: If response is 200, returns:
             {
@@ -492,27 +1581,35 @@ async def service_status():
                 "status": str,
                 "version": str,
                 "uptime": str,
-                "services": dict
+                "services": dict,
+                "cache_age_seconds": float,
+                "last_success_at": str | None
             }
         For other errors, returns:
             {
                 "status": "error",
                 "code": int,
-                "message": str
+                "message": str,
+                "cache_age_seconds": float,
+                "last_success_at": str | None
             }
     """
-    api_url = f"{API_BASE_URL}/status"
+    return await status_probe.get()
+
+async def _fetch_service_status():
+    """Calls /status once."""
+    api_path = "/status"
     headers = {
         "Accept": "application/json"
     }
 
-    logger.info(f"Fetching service status from {api_url}")
+    logger.info(f"Fetching service status from {api_path}")
     try:
-        response = requests.get(api_url, headers=headers)
+        response, _ = await backend_pool.request("status", "GET", api_path, headers=headers)
         logger.info(f"Received response with status code: {response.status_code}")
         if response.status_code == 200:
             logger.info("Service status fetched successfully.")
-            return response.json()
+            return _decode(response)
         else:
             logger.error(f"Service status failed: {response.status_code}: {response.text}")
             return {
@@ -520,10 +1617,193 @@ async def service_status():
                 "code": response.status_code,
                 "message": response.text
             }
-    except requests.RequestException as e:
-        logger.error(f"RequestException during service status fetch - {str(e)}")
+    except BackendError as e:
+        logger.error(f"BackendError during service status fetch - {str(e)}")
         return {
             "status": "error",
-            "code": 500,
+            "code": e.code,
             "message": str(e)
-        }
\ No newline at end of file
+        }
+
+async def get_scan_cache_stats():
+    """
+    Reports the state of this worker's scan result cache and CVE metadata table.
+
+    Returns:
+        dict: Returns:
+            {
+                "entries": int,
+                "bytes": int,
+                "max_bytes": int,
+                "ttl_seconds": float,
+                "hits": int,
+                "misses": int,
+                "hit_ratio": float,
+                "evictions": int,
+                "expirations": int,
+                "cve_table": {
+                    "entries": int,
+                    "max_entries": int,
+                    "shared_values": int,   # field values replaced by the table's copy
+                    "evictions": int
+                },
+                "shared": {                 # only with several workers: the cache they share
+                    "entries": int,
+                    "bytes": int,
+                    "max_bytes": int
+                }
+            }
+    """
+    stats = {**scan_cache.stats(), "cve_table": cve_table.stats()}
+    if shared_state is not None:
+        stats["shared"] = {**await shared_state.stats("scan_result"), "max_bytes": SHARED_SCAN_CACHE_MAX_BYTES}
+    return stats
+
+async def vulnerability_analytics(
+    group_by: str = "package",
+    metric: str = "count",
+    top_k: int = 20,
+    severity: str = "",
+    min_cvs_score: float | None = None,
+    min_repos: int = 0,
+    repo_url: str = ""
+):
+    """
+    Aggregates the findings of every repository scanned by this service.
+
+    The latest scan result of each repository is kept in a columnar store, so
+    questions across many repositories are answered without rescanning, e.g.
+    "top 20 packages by total CVSS" (group_by="package", metric="total_cvss") or
+    "critical CVEs in more than 10 repos" (group_by="cve", severity="critical", min_repos=11).
+
+    The store is not shared between processes. In worker mode each worker only
+    holds the scans it ran itself, so the answer covers one worker's scans and
+    depends on which worker handles the call; "store" then names that worker.
+
+    Args:
+        group_by (str): One of "package", "cve", "repo", "severity", "package_manager".
+        metric (str): Ranks groups by "count", "repos" (distinct repositories),
+            "total_cvss" or "max_cvss" (default: "count").
+        top_k (int): Number of groups to return (default: 20, max: ANALYTICS_MAX_TOP_K).
+        severity (str, optional): Only count these severities, comma-separated (e.g. "high,critical").
+        min_cvs_score (float, optional): Only count findings with at least this CVSS score.
+        min_repos (int): Only return groups found in at least this many repositories.
+        repo_url (str, optional): Only count findings of this repository.
+
+    Returns:
+        dict: Returns:
+            {
+                "groups": [
+                    {
+                        "key": str,
+                        "count": int,
+                        "repos": int,
+                        "total_cvss": float,
+                        "max_cvss": float | None,
+                        "cvss_percentiles": {"p50": float, "p90": float, "p99": float} | None
+                    },
+                    ...
+                ],
+                "totals": {
+                    "findings": int,            # findings matching the filters
+                    "repositories": int,
+                    "groups": int,
+                    "cvss_percentiles": {"p50": float, "p90": float, "p99": float} | None
+                },
+                "store": {
+                    "repositories": int,
+                    "findings": int,
+                    ...,
+                    "worker": str           # only in worker mode: "<index>/<pid>"
+                }
+            }
+        For invalid arguments, returns:
+            {
+                "status": "error",
+                "code": 422,
+                "message": str
+            }
+        If numpy is not installed, returns the same shape with code 501.
+    """
+    if findings_store is None:
+        return {
+            "status": "error",
+            "code": 501,
+            "message": "Vulnerability analytics requires numpy, which is not installed."
+        }
+    if group_by not in GROUP_BY_COLUMNS or metric not in SORT_METRICS:
+        return {
+            "status": "error",
+            "code": 422,
+            "message": f"group_by must be one of {', '.join(GROUP_BY_COLUMNS)} and metric one of {', '.join(SORT_METRICS)}."
+        }
+    snapshot = findings_store.snapshot()
+    # The aggregation runs in a worker thread; NumPy releases the GIL for most of it.
+    result = await asyncio.to_thread(
+        snapshot.query,
+        group_by=group_by,
+        metric=metric,
+        top_k=min(top_k, ANALYTICS_MAX_TOP_K),
+        severities=parse_severities(severity),
+        min_cvs_score=min_cvs_score,
+        min_repos=min_repos,
+        repo=normalize_repo_url(repo_url) if repo_url else ""
+    )
+    result["store"] = findings_store.stats()
+    if is_worker():
+        result["store"]["worker"] = worker_name()
+    return result
+
+async def dump_slow_calls(admin_token: str, clear: bool = False):
+    """
+    Returns the most recent slow tool calls. Admin only.
+
+    A call is recorded when it takes longer than SLOW_CALL_THRESHOLD_MS. Only the
+    last SLOW_CALL_BUFFER_SIZE records are kept. With SLOW_CALL_PROFILE enabled,
+    each record also summarizes the event loop stacks sampled while it ran.
+
+    Args:
+        admin_token (str): Must match the ADMIN_TOKEN the service was started with.
+        clear (bool): If True, empties the buffer after reading it.
+
+    Returns:
+        dict: Returns:
+            {
+                "threshold_ms": float,
+                "capacity": int,
+                "recorded": int,                # slow calls seen since start
+                "profiling": bool,
+                "calls": [
+                    {
+                        "tool": str,
+                        "started_at": str,
+                        "duration_ms": float,
+                        "phases_ms": {str: float},      # e.g. scheduler_wait, backend.scan, json_decode
+                        "backend_calls": int,
+                        "request_bytes": int,
+                        "response_bytes": int,
+                        "backend_response_bytes": int,
+                        "error": str | None,
+                        "profile": [{"stack": str, "samples": int}, ...]    # only when profiling
+                    },
+                    ...
+                ]
+            }
+        If the token does not match, returns:
+            {
+                "status": "error",
+                "code": 401,
+                "message": str
+            }
+    """
+    if not ADMIN_TOKEN or not hmac.compare_digest(admin_token.encode(), ADMIN_TOKEN.encode()):
+        logger.warning("Rejected slow call dump with an invalid admin token")
+        return {
+            "status": "error",
+            "code": 401,
+            "message": "Invalid admin token"
+        }
+    return slow_calls.dump(clear=clear)
+
+health_probe = CachedProbe("health", _fetch_health, refresh_interval=HEALTH_CACHE_TTL_SECONDS, timeout=HEALTH_PROBE_TIMEOUT)
+status_probe = CachedProbe("status", _fetch_service_status, refresh_interval=HEALTH_CACHE_TTL_SECONDS, timeout=HEALTH_PROBE_TIMEOUT)
@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from src import backend_pool, resilience
+from src.backend_pool import BackendPool
+from src.scheduler import SCAN, OutboundScheduler
+
+URLS = ["http://a.test", "http://b.test", "http://c.test"]
+
+class ChooseTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = BackendPool(URLS)
+        self.a, self.b, self.c = self.pool.backends
+
+    def test_least_outstanding_wins(self):
+        self.a.outstanding, self.b.outstanding, self.c.outstanding = 3, 1, 2
+        self.assertIs(self.pool.choose(), self.b)
+
+    def test_unhealthy_backends_are_skipped(self):
+        self.a.outstanding, self.b.outstanding, self.c.outstanding = 3, 1, 2
+        self.b.healthy = False
+        self.assertIs(self.pool.choose(), self.c)
+        self.assertIs(self.pool.choose(exclude=(self.c.url,)), self.a)
+
+    def test_all_unhealthy_uses_every_backend(self):
+        for backend in self.pool.backends:
+            backend.healthy = False
+        self.c.outstanding = 0
+        self.a.outstanding = self.b.outstanding = 1
+        self.assertIs(self.pool.choose(), self.c)
+
+    def test_job_affinity_is_bounded(self):
+        with mock.patch.object(backend_pool, "JOB_AFFINITY_MAX_ENTRIES", 2):
+            self.pool.pin_job("job-1", self.a)
+            self.pool.pin_job("job-2", self.b)
+            self.pool.backend_for_job("job-1")
+            self.pool.pin_job("job-3", self.c)
+        self.assertIs(self.pool.backend_for_job("job-1"), self.a)
+        self.assertIsNone(self.pool.backend_for_job("job-2"))
+        self.pool.forget_job("job-1")
+        self.assertIsNone(self.pool.backend_for_job("job-1"))
+
+class RouteTest(unittest.IsolatedAsyncioTestCase):
+    """Calls go to the least busy backend unless they are about a job another backend holds."""
+
+    async def asyncSetUp(self):
+        self.pool = BackendPool(URLS[:2])
+        self.a, self.b = self.pool.backends
+        self.hosts = []
+        self.jobs = {}  # job id -> host that knows it
+        self.hold = asyncio.Event()
+        self.hold.set()
+
+        async def handler(request):
+            self.hosts.append(request.url.host)
+            await self.hold.wait()
+            job_id = request.url.path.rsplit("/", 1)[-1]
+            if request.url.path.startswith("/api/v1/jobs/") and self.jobs.get(job_id) != request.url.host:
+                return httpx.Response(404)
+            return httpx.Response(200, json={"id": job_id})
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        patches = [
+            mock.patch.dict(resilience.breakers, clear=True),
+            mock.patch.object(resilience, "get_client", lambda: self.client),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_busy_backend_is_avoided(self):
+        self.hold.clear()
+        first = asyncio.create_task(self.pool._route("status", "GET", "/status", None))
+        await asyncio.sleep(0.01)
+        busy = self.a if self.a.outstanding else self.b
+        self.assertEqual(busy.outstanding, 1)
+        second = asyncio.create_task(self.pool._route("status", "GET", "/status", None))
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.a.outstanding + self.b.outstanding, 2)
+        self.assertEqual(len(set(self.hosts)), 2)
+        self.hold.set()
+        await asyncio.gather(first, second)
+        self.assertEqual((self.a.outstanding, self.b.outstanding), (0, 0))
+
+    async def test_unknown_job_is_found_and_pinned(self):
+        self.jobs["job-1"] = "b.test"
+        response, backend = await self.pool._route("job", "GET", "/api/v1/jobs/job-1", "job-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(backend, self.b)
+        self.assertIs(self.pool.backend_for_job("job-1"), self.b)
+
+    async def test_pinned_job_ignores_load(self):
+        self.jobs["job-1"] = "a.test"
+        self.pool.pin_job("job-1", self.a)
+        self.a.outstanding = 5
+        self.hosts.clear()
+        response, backend = await self.pool._route("job", "GET", "/api/v1/jobs/job-1", "job-1")
+        self.assertIs(backend, self.a)
+        self.assertEqual(self.hosts, ["a.test"])
+
+    async def test_job_on_no_backend_returns_404(self):
+        response, backend = await self.pool._route("job", "GET", "/api/v1/jobs/job-9", "job-9")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(sorted(self.hosts), ["a.test", "b.test"])
+        self.assertIsNone(self.pool.backend_for_job("job-9"))
+
+class StreamTest(unittest.IsolatedAsyncioTestCase):
+    """A streamed body is read while its scheduler slot and backend are still counted as busy."""
+
+    async def asyncSetUp(self):
+        self.pool = BackendPool(URLS[:1])
+        self.scheduler = OutboundScheduler()
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True})))
+        patches = [
+            mock.patch.dict(resilience.breakers, clear=True),
+            mock.patch.object(resilience, "get_client", lambda: self.client),
+            mock.patch.object(backend_pool, "outbound_scheduler", self.scheduler),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_slot_is_held_until_block_exits(self):
+        backend = self.pool.backends[0]
+        async with self.pool.stream("scan", "POST", "/api/v1/scan") as (response, chosen):
+            self.assertIs(chosen, backend)
+            self.assertEqual(backend.outstanding, 1)
+            self.assertEqual(self.scheduler.snapshot()["in_flight"], {SCAN: 1})
+            self.assertEqual(await response.aread(), b'{"ok":true}')
+        self.assertTrue(response.is_closed)
+        self.assertEqual(backend.outstanding, 0)
+        self.assertEqual(self.scheduler.snapshot()["in_flight"], {SCAN: 0})
+
+    async def test_slot_is_released_when_block_fails(self):
+        with self.assertRaises(ValueError):
+            async with self.pool.stream("scan", "POST", "/api/v1/scan"):
+                raise ValueError("bad body")
+        self.assertEqual(self.pool.backends[0].outstanding, 0)
+        self.assertEqual(self.scheduler.snapshot()["in_flight"], {SCAN: 0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+import httpx
+
+from src import tools
+from src.job_index import JobIndex
+
+RUNNING = {"id": "job-1", "status": "running", "repo_url": "https://github.com/o/r", "result": None}
+COMPLETED = {"id": "job-1", "status": "completed", "repo_url": "https://github.com/o/r", "result": {"fixed": 3}}
+LISTED_COMPLETED = {"id": "job-1", "status": "completed", "repo_url": "https://github.com/o/r"}
+
+class JobIndexDetailTest(unittest.IsolatedAsyncioTestCase):
+    """A detailed copy stored while a job ran must not be served once a listing shows it finished."""
+
+    async def asyncSetUp(self):
+        self.index = JobIndex(":memory:")
+
+    async def asyncTearDown(self):
+        self.index.close()
+
+    async def test_listing_status_change_clears_detail(self):
+        await self.index.upsert([RUNNING], detailed=True)
+        await self.index.upsert([LISTED_COMPLETED])
+        self.assertIsNone(await self.index.get_finished("job-1"))
+
+    async def test_detailed_terminal_job_is_served(self):
+        await self.index.upsert([COMPLETED], detailed=True)
+        await self.index.upsert([LISTED_COMPLETED])
+        self.assertEqual(await self.index.get_finished("job-1"), COMPLETED)
+
+    async def test_status_after_listing_refetches_result(self):
+        responses = [httpx.Response(200, json=RUNNING), httpx.Response(200, json=COMPLETED)]
+        request = mock.AsyncMock(side_effect=lambda *args, **kwargs: (responses.pop(0), None))
+        with mock.patch.object(tools, "job_index", self.index), mock.patch.object(tools.backend_pool, "request", request):
+            self.assertEqual((await tools.get_scan_and_fix_job_status("job-1"))["status"], "running")
+            await self.index.upsert([LISTED_COMPLETED])
+            result = await tools.get_scan_and_fix_job_status("job-1")
+            self.assertEqual(result["result"], {"fixed": 3})
+            self.assertEqual(request.await_count, 2)
+            # Now detailed and terminal: served from the index.
+            self.assertEqual(await tools.get_scan_and_fix_job_status("job-1"), COMPLETED)
+            self.assertEqual(request.await_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
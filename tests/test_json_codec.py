@@ -0,0 +1,47 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import httpx
+
+from src import json_codec, tools
+from src.json_codec import decode_response_stream
+
+NOT_OBJECTS = [b'[{"id": 1}]', b"null", b'"done"', b"  \n", b""]
+
+def streamed(body: bytes) -> httpx.Response:
+    return httpx.Response(200, stream=httpx.ByteStream(body))
+
+class DecodeResponseStreamTest(unittest.IsolatedAsyncioTestCase):
+    """Streamed and fallback decoding accept the same bodies."""
+
+    async def decode(self, body: bytes, streaming: bool):
+        with mock.patch.object(json_codec, "STREAMING_AVAILABLE", streaming and json_codec.STREAMING_AVAILABLE):
+            return await decode_response_stream(streamed(body))
+
+    async def test_object_is_decoded(self):
+        for streaming in (True, False):
+            with self.subTest(streaming=streaming):
+                result = await self.decode(b' {"vulnerabilities": [{"cve": "CVE-1"}], "total": 1.5}', streaming)
+                self.assertEqual(result, {"vulnerabilities": [{"cve": "CVE-1"}], "total": 1.5})
+
+    async def test_other_top_level_values_are_rejected(self):
+        for streaming in (True, False):
+            for body in NOT_OBJECTS:
+                with self.subTest(streaming=streaming, body=body), self.assertRaises(ValueError):
+                    await self.decode(body, streaming)
+
+    async def test_scan_with_non_object_body_is_not_cached(self):
+        @asynccontextmanager
+        async def stream(*args, **kwargs):
+            yield streamed(b"[]"), None
+
+        with mock.patch.object(tools.backend_pool, "stream", stream), \
+                mock.patch.object(tools, "shared_state", None), \
+                mock.patch.object(tools.scan_cache, "put") as put:
+            result = await tools._request_scan("https://github.com/o/r", "pat", "me", True, "key")
+        self.assertEqual(result["code"], 502)
+        put.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+import httpx
+
+from src import resilience
+from src.backend_pool import BackendPool
+from src.resilience import BackendError, BackendTimeoutError, CircuitBreaker, CircuitOpenError, EndpointPolicy
+
+URL = "http://backend.test/status"
+
+def mock_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("job@http://backend.test", failure_threshold=2, reset_timeout=30, half_open_max_calls=1)
+
+    def open_and_expire(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.opened_at -= self.breaker.reset_timeout
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_admits_limited_probes(self):
+        self.open_and_expire()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_probe_success_closes(self):
+        self.open_and_expire()
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.before_call()
+
+    def test_probe_failure_reopens(self):
+        self.open_and_expire()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_release_frees_probe_slot(self):
+        self.open_and_expire()
+        self.breaker.before_call()
+        self.breaker.release()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+class SendRequestBreakerTest(unittest.IsolatedAsyncioTestCase):
+    """Every way a call can end must leave the breaker able to take the next probe."""
+
+    async def asyncSetUp(self):
+        self.breaker = CircuitBreaker("status@http://backend.test", failure_threshold=1, reset_timeout=0)
+        self.responses = []
+        self.handler = lambda request: self.responses.pop(0)
+        self.client = mock_client(lambda request: self.handler(request))
+        patches = [
+            mock.patch.dict(resilience.breakers, {self.breaker.name: self.breaker}),
+            mock.patch.object(resilience, "get_client", lambda: self.client),
+            mock.patch.object(resilience.ENDPOINT_POLICIES["status"], "retries", 0),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_decoding_error_during_probe_reopens_then_recovers(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        # A 500 whose body claims gzip but is not: reading it raises DecodingError.
+        body = httpx.ByteStream(b"not gzip")
+        self.responses.append(httpx.Response(500, headers={"content-encoding": "gzip"}, stream=body))
+        with self.assertRaises(BackendError):
+            await resilience.send_request("status", "GET", URL, stream=True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker._probes, 0)
+
+        self.responses.append(httpx.Response(200, json={"status": "ok"}))
+        response = await resilience.send_request("status", "GET", URL)
+        self.assertEqual(response.json(), {"status": "ok"})
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def half_open(self):
+        self.breaker.record_failure()
+        self.breaker.before_call()
+        self.breaker.release()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+    async def test_transport_error_during_probe_reopens(self):
+        self.half_open()
+
+        def fail(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        self.handler = fail
+        with self.assertRaises(BackendError):
+            await resilience.send_request("status", "GET", URL)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker._probes, 0)
+
+    async def test_timeout_during_probe_reopens(self):
+        self.half_open()
+
+        def time_out(request):
+            raise httpx.ReadTimeout("slow", request=request)
+
+        self.handler = time_out
+        with self.assertRaises(BackendTimeoutError):
+            await resilience.send_request("status", "GET", URL)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    async def test_unexpected_error_during_probe_frees_slot(self):
+        self.half_open()
+
+        def broken(request):
+            raise RuntimeError("bug")
+
+        self.handler = broken
+        with self.assertRaises(RuntimeError):
+            await resilience.send_request("status", "GET", URL)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker._probes, 0)
+
+    async def test_cancelled_probe_frees_slot(self):
+        self.half_open()
+        entered = asyncio.Event()
+
+        async def hang(request):
+            entered.set()
+            await asyncio.Event().wait()
+
+        self.handler = hang
+        task = asyncio.create_task(resilience.send_request("status", "GET", URL))
+        await entered.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker._probes, 0)
+
+    async def test_server_error_during_probe_reopens(self):
+        self.half_open()
+        self.responses.append(httpx.Response(500))
+        response = await resilience.send_request("status", "GET", URL)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+class EndpointPolicyTest(unittest.IsolatedAsyncioTestCase):
+    def test_env_overrides_defaults(self):
+        env = {"BACKEND_SCAN_READ_TIMEOUT": "60", "BACKEND_SCAN_RETRIES": "3"}
+        with mock.patch.dict(os.environ, env):
+            policy = EndpointPolicy("scan", connect_timeout=5.0, read_timeout=900.0, retries=0)
+        self.assertEqual(policy.timeout.read, 60.0)
+        self.assertEqual(policy.timeout.connect, 5.0)
+        self.assertEqual(policy.retries, 3)
+
+    def test_breakers_are_per_endpoint_and_origin(self):
+        with mock.patch.dict(resilience.breakers, clear=True):
+            scan = resilience.breaker_for("scan", "http://a.test/scan?x=1")
+            self.assertIs(resilience.breaker_for("scan", "http://a.test/other"), scan)
+            self.assertIsNot(resilience.breaker_for("job", "http://a.test/jobs/1"), scan)
+            self.assertIsNot(resilience.breaker_for("scan", "http://b.test/scan"), scan)
+
+    async def test_only_idempotent_methods_are_retried(self):
+        calls = []
+
+        def unavailable(request):
+            calls.append(request.method)
+            return httpx.Response(503)
+
+        client = mock_client(unavailable)
+        self.addAsyncCleanup(client.aclose)
+        with mock.patch.dict(resilience.breakers, clear=True), \
+                mock.patch.object(resilience, "get_client", lambda: client), \
+                mock.patch.object(resilience, "_backoff_delay", lambda attempt: 0):
+            await resilience.send_request("job", "GET", "http://a.test/jobs/1")
+            await resilience.send_request("scan_and_fix", "POST", "http://a.test/scan-and-fix")
+        self.assertEqual(calls, ["GET"] * (resilience.ENDPOINT_POLICIES["job"].retries + 1) + ["POST"])
+
+class FindJobTest(unittest.IsolatedAsyncioTestCase):
+    """An unpinned job lookup must not stop at a backend whose circuit is open."""
+
+    async def asyncSetUp(self):
+        self.pool = BackendPool(["http://a.test", "http://b.test"])
+        self.statuses = {"a.test": 200, "b.test": 200}
+        self.client = mock_client(lambda request: httpx.Response(self.statuses[request.url.host], json={"id": "job-1"}))
+        patches = [
+            mock.patch.dict(resilience.breakers, clear=True),
+            mock.patch.object(resilience, "get_client", lambda: self.client),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        breaker = resilience.breaker_for("job", "http://a.test")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_job_found_past_open_circuit(self):
+        response, backend = await self.pool._find_job("job-1", "job", "GET", "/jobs/job-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(backend.url, "http://b.test")
+        self.assertIs(self.pool.backend_for_job("job-1"), backend)
+
+    async def test_not_found_elsewhere_raises_open_circuit(self):
+        self.statuses["b.test"] = 404
+        with self.assertRaises(CircuitOpenError):
+            await self.pool._find_job("job-1", "job", "GET", "/jobs/job-1")
+        self.assertIsNone(self.pool.backend_for_job("job-1"))
+
+if __name__ == "__main__":
+    unittest.main()
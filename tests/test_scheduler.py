@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src import scheduler as scheduler_module
+from src import tools
+from src.scheduler import INTERACTIVE, SCAN, AdmissionRejectedError, OutboundScheduler
+
+COMPLETED = {"id": "job-1", "status": "completed", "repo_url": "https://github.com/o/r", "result": {"fixed": 3}}
+REJECTED = {"status": "error", "code": 429, "message": "Too many backend calls are queued; retry later."}
+
+def scheduler(**kwargs) -> OutboundScheduler:
+    options = {"max_concurrency": 1, "budgets": {INTERACTIVE: 1, SCAN: 1}, "max_per_client": 1, "max_queue": 8, "max_wait": 5.0}
+    options.update(kwargs)
+    return OutboundScheduler(**options)
+
+async def settle():
+    """Lets woken waiters run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+class OutboundSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def queue(self, scheduler: OutboundScheduler, cls: str, client: str, order: list) -> asyncio.Task:
+        async def call():
+            await scheduler.acquire(cls, client)
+            order.append(client)
+
+        task = asyncio.create_task(call())
+        await settle()
+        return task
+
+    async def test_interactive_calls_go_before_scans(self):
+        s = scheduler(budgets={INTERACTIVE: 1, SCAN: 1}, max_per_client=4)
+        order = []
+        await s.acquire(SCAN, "a")
+        tasks = [
+            await self.queue(s, SCAN, "b", order),
+            await self.queue(s, INTERACTIVE, "c", order),
+        ]
+        s.release(SCAN, "a")
+        await settle()
+        self.assertEqual(order, ["c"])
+        s.release(INTERACTIVE, "c")
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["c", "b"])
+
+    async def test_client_with_fewest_scans_goes_first(self):
+        s = scheduler(max_concurrency=2, budgets={INTERACTIVE: 2, SCAN: 2}, max_per_client=2)
+        order = []
+        await s.acquire(SCAN, "a")
+        await s.acquire(SCAN, "b")
+        tasks = [
+            await self.queue(s, SCAN, "a", order),
+            await self.queue(s, SCAN, "c", order),
+        ]
+        s.release(SCAN, "b")
+        await settle()
+        self.assertEqual(order, ["c"])
+        s.release(SCAN, "c")
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["c", "a"])
+
+    async def test_client_cap_limits_scans(self):
+        s = scheduler(max_concurrency=4, budgets={INTERACTIVE: 4, SCAN: 4}, max_per_client=1)
+        order = []
+        await s.acquire(SCAN, "a")
+        capped = await self.queue(s, SCAN, "a", order)
+        await s.acquire(SCAN, "b")
+        self.assertEqual(order, [])
+        s.release(SCAN, "a")
+        await capped
+        self.assertEqual(order, ["a"])
+
+    async def test_wait_at_own_client_cap_is_not_rejected(self):
+        s = scheduler(max_concurrency=4, budgets={INTERACTIVE: 4, SCAN: 4}, max_wait=0.05)
+        order = []
+        await s.acquire(SCAN, "a")
+        capped = await self.queue(s, SCAN, "a", order)
+        await asyncio.sleep(0.15)
+        self.assertFalse(capped.done())
+        s.release(SCAN, "a")
+        await capped
+        self.assertEqual(order, ["a"])
+        self.assertEqual(s.rejected, 0)
+
+    async def test_wait_budget_rejects_with_429(self):
+        s = scheduler(max_wait=0.05)
+        await s.acquire(SCAN, "a")
+        with self.assertRaises(AdmissionRejectedError) as raised:
+            await s.acquire(SCAN, "b")
+        self.assertEqual(raised.exception.code, 429)
+        self.assertEqual(s.rejected, 1)
+        self.assertEqual(s.snapshot()["queued"], 0)
+
+    async def test_full_queue_rejects_with_429(self):
+        s = scheduler(max_queue=1)
+        order = []
+        await s.acquire(INTERACTIVE, "a")
+        queued = await self.queue(s, INTERACTIVE, "b", order)
+        with self.assertRaises(AdmissionRejectedError) as raised:
+            await s.acquire(INTERACTIVE, "c")
+        self.assertEqual(raised.exception.code, 429)
+        self.assertEqual(s.rejected, 1)
+        s.release(INTERACTIVE, "a")
+        await queued
+        self.assertEqual(order, ["b"])
+
+    async def test_unidentified_client_is_not_capped(self):
+        s = scheduler(max_concurrency=4, budgets={INTERACTIVE: 4, SCAN: 4}, max_per_client=1)
+        for _ in range(3):
+            await s.acquire(SCAN, None)
+        self.assertEqual(s.snapshot()["in_flight"], {SCAN: 3})
+        for _ in range(3):
+            s.release(SCAN, None)
+        self.assertEqual(s.snapshot()["in_flight"], {SCAN: 0})
+
+    async def test_cancelled_waiter_holds_no_slot(self):
+        s = scheduler()
+        await s.acquire(SCAN, "a")
+        waiting = await self.queue(s, SCAN, "b", [])
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        s.release(SCAN, "a")
+        self.assertEqual(s.snapshot(), {"in_flight": {SCAN: 0}, "queued": 0, "rejected": 0})
+
+class CurrentClientIdTest(unittest.TestCase):
+    """In worker mode only an explicit identity names a client; the peer address is shared behind a proxy."""
+
+    def client_id(self, headers: dict, worker: bool, token=None):
+        request = mock.Mock(headers=headers, client=mock.Mock(host="10.0.0.1"))
+        context = mock.Mock(session_id="session-1")
+        with mock.patch.object(scheduler_module, "get_http_request", return_value=request), \
+                mock.patch.object(scheduler_module, "get_access_token", return_value=token), \
+                mock.patch.object(scheduler_module, "get_context", return_value=context), \
+                mock.patch.object(scheduler_module, "is_worker", return_value=worker):
+            return scheduler_module.current_client_id()
+
+    def test_header_wins(self):
+        self.assertEqual(self.client_id({"x-client-id": "ci"}, worker=True), "header:ci")
+
+    def test_token_client(self):
+        self.assertEqual(self.client_id({}, worker=True, token=mock.Mock(client_id="app")), "auth:app")
+
+    def test_session_outside_worker_mode(self):
+        self.assertEqual(self.client_id({}, worker=False), "session-1")
+
+    def test_unknown_in_worker_mode(self):
+        self.assertIsNone(self.client_id({}, worker=True))
+
+class WaitForJobAdmissionTest(unittest.IsolatedAsyncioTestCase):
+    """A scheduler rejection while polling is temporary and must not end the wait."""
+
+    async def test_rejected_poll_is_retried(self):
+        status = mock.AsyncMock(side_effect=[REJECTED, REJECTED, COMPLETED])
+        with mock.patch.object(tools, "get_scan_and_fix_job_status", status), \
+                mock.patch.object(tools, "JOB_POLL_INITIAL_INTERVAL", 0.01), \
+                mock.patch.object(tools, "callbacks_enabled", lambda: False):
+            self.assertEqual(await tools.wait_for_job("job-1", timeout_seconds=5), COMPLETED)
+        self.assertEqual(status.await_count, 3)
+
+    async def test_rejection_at_deadline_times_out(self):
+        status = mock.AsyncMock(return_value=REJECTED)
+        with mock.patch.object(tools, "get_scan_and_fix_job_status", status):
+            result = await tools.wait_for_job("job-1", timeout_seconds=0)
+        self.assertEqual(result["code"], 408)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+import httpx
+
+from src.singleflight import SingleFlight
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    """Concurrent calls for one key reach the backend once and all see its outcome."""
+
+    async def asyncSetUp(self):
+        self.flight = SingleFlight()
+        self.requests = []
+        self.release = asyncio.Event()
+        self.status = 200
+
+        async def handler(request):
+            self.requests.append(request.url.path)
+            await self.release.wait()
+            return httpx.Response(self.status, json={"path": request.url.path})
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://backend.test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def fetch(self, path: str) -> dict:
+        response = await self.client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+    def start(self, key: str, count: int) -> list[asyncio.Task]:
+        return [asyncio.create_task(self.flight.do(key, self.fetch, key)) for _ in range(count)]
+
+    async def test_concurrent_calls_are_coalesced(self):
+        tasks = self.start("/scan/a", 3)
+        await asyncio.sleep(0.01)
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+        self.assertEqual(results, [{"path": "/scan/a"}] * 3)
+        self.assertEqual(self.requests, ["/scan/a"])
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "started": 1, "coalesced": 2})
+
+    async def test_different_keys_are_not_coalesced(self):
+        tasks = self.start("/scan/a", 1) + self.start("/scan/b", 1)
+        await asyncio.sleep(0.01)
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(sorted(self.requests), ["/scan/a", "/scan/b"])
+
+    async def test_error_reaches_every_caller_and_is_not_kept(self):
+        self.status = 503
+        tasks = self.start("/scan/a", 3)
+        await asyncio.sleep(0.01)
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, httpx.HTTPStatusError)
+        self.assertEqual(self.requests, ["/scan/a"])
+
+        # The failure is not cached: the next call goes to the backend again.
+        self.status = 200
+        self.assertEqual(await self.flight.do("/scan/a", self.fetch, "/scan/a"), {"path": "/scan/a"})
+        self.assertEqual(self.requests, ["/scan/a", "/scan/a"])
+
+    async def test_cancelled_caller_does_not_cancel_the_call(self):
+        first, second = self.start("/scan/a", 2)
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.release.set()
+        self.assertEqual(await second, {"path": "/scan/a"})
+        self.assertEqual(self.requests, ["/scan/a"])
+
+if __name__ == "__main__":
+    unittest.main()